@@ -0,0 +1,44 @@
+"""Add user registered trigger
+
+Revision ID: 3c9e5f2a7b41
+Revises: 8d4f2a6c1e37
+Create Date: 2026-10-18 14:12:37.540918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.common.constants import USER_REGISTERED_CHANNEL
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e5f2a7b41'
+down_revision: Union[str, None] = '8d4f2a6c1e37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION public.notify_user_registered() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{USER_REGISTERED_CHANNEL}', encode(NEW.email_bidx, 'hex'));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER user_registered
+        AFTER INSERT OR UPDATE OF email_bidx
+        ON public."user"
+        FOR EACH ROW EXECUTE FUNCTION public.notify_user_registered()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER user_registered ON public."user"')
+    op.execute('DROP FUNCTION public.notify_user_registered()')
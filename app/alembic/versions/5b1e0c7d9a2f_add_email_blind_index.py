@@ -0,0 +1,57 @@
+"""Add email blind index
+
+Revision ID: 5b1e0c7d9a2f
+Revises: 17315875f468
+Create Date: 2026-10-18 10:02:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import app
+from app.core.config import settings
+from app.sqltypes import blind_index
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e0c7d9a2f'
+down_revision: Union[str, None] = '17315875f468'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.add_column(
+        'user',
+        sa.Column('email_bidx', app.sqltypes.BlindIndex(), nullable=True),
+        schema='public'
+    )
+
+    # Backfill in batches, walking the primary key so each batch is an index range scan
+    connection = op.get_bind()
+    select_batch = sa.text(
+        'SELECT id, pgp_sym_decrypt(email, :key) FROM public."user" '
+        'WHERE email_bidx IS NULL AND id > :last_id ORDER BY id LIMIT :limit'
+    )
+    update_row = sa.text('UPDATE public."user" SET email_bidx = :bidx WHERE id = :id')
+    last_id = '00000000-0000-0000-0000-000000000000'
+    while True:
+        rows = connection.execute(
+            select_batch,
+            {"key": settings.POSTGRES_ENCRYPTION_KEY, "last_id": last_id, "limit": BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(update_row, [{"id": row[0], "bidx": blind_index(row[1])} for row in rows])
+        last_id = rows[-1][0]
+
+    op.alter_column('user', 'email_bidx', nullable=False, schema='public')
+    op.create_unique_constraint('user_email_bidx_key', 'user', ['email_bidx'], schema='public')
+
+
+def downgrade() -> None:
+    op.drop_constraint('user_email_bidx_key', 'user', schema='public', type_='unique')
+    op.drop_column('user', 'email_bidx', schema='public')
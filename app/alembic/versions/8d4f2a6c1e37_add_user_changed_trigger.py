@@ -0,0 +1,44 @@
+"""Add user changed trigger
+
+Revision ID: 8d4f2a6c1e37
+Revises: 5b1e0c7d9a2f
+Create Date: 2026-10-18 11:26:09.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.common.constants import USER_CHANGED_CHANNEL
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4f2a6c1e37'
+down_revision: Union[str, None] = '5b1e0c7d9a2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION public.notify_user_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{USER_CHANGED_CHANNEL}', COALESCE(NEW.id, OLD.id)::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER user_changed
+        AFTER UPDATE OF email, password, gender, is_active, last_login, key_version OR DELETE
+        ON public."user"
+        FOR EACH ROW EXECUTE FUNCTION public.notify_user_changed()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER user_changed ON public."user"')
+    op.execute('DROP FUNCTION public.notify_user_changed()')
@@ -0,0 +1,38 @@
+"""Add user listing indexes
+
+Revision ID: b7e3d1f5a9c2
+Revises: 3c9e5f2a7b41
+Create Date: 2026-10-18 16:40:12.583021
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3d1f5a9c2'
+down_revision: Union[str, None] = '3c9e5f2a7b41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_user_date_joined_id': ['date_joined', 'id'],
+    'ix_user_is_active_date_joined_id': ['is_active', 'date_joined', 'id'],
+    'ix_user_gender_date_joined_id': ['gender', 'date_joined', 'id'],
+}
+
+
+def upgrade() -> None:
+    # Built concurrently so the user table stays writable, which can't run in a transaction
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(
+                name, 'user', columns, unique=False, schema='public',
+                postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='user', schema='public', postgresql_concurrently=True, if_exists=True)
@@ -1,43 +1,67 @@
 from typing import Any, ClassVar, LiteralString
 
 from pydantic import BaseModel as PydanticBaseModel, ValidationError
-from pydantic_core import InitErrorDetails, PydanticCustomError
+from pydantic_core import ErrorDetails, InitErrorDetails, PydanticCustomError
+
+
+def _custom_errors(errors: list[ErrorDetails], messages: dict[tuple[str, str], str]) -> list[InitErrorDetails]:
+    # The errors of a failed validation, with the message of `error_messages` where there is one
+    new_errors: list[InitErrorDetails] = []
+    for error in errors:
+        custom_message = messages.get((error["loc"][0], error["type"]))
+        ctx = error.get("ctx")
+        if custom_message:
+            new_errors.append(
+                InitErrorDetails(
+                    type=PydanticCustomError(
+                        error["type"],
+                        custom_message.format(**ctx) if ctx else custom_message,
+                    ),
+                    loc=error["loc"],
+                    input=error.get("input"),
+                    ctx=ctx,
+                )
+            )
+        else:
+            new_errors.append(
+                InitErrorDetails(
+                    type=PydanticCustomError(
+                        error["type"],
+                        error.get("msg"),
+                    ),
+                    loc=error["loc"],
+                    input=error.get("input"),
+                    ctx=ctx,
+                )
+            )
+    return new_errors
 
 
 class BaseModel(PydanticBaseModel):
     error_messages: ClassVar[dict[str, dict[str, LiteralString]]] = {}
+    # `error_messages` flattened to (field, error type) -> message, built once per class
+    _compiled_error_messages: ClassVar[dict[tuple[str, str], str]] = {}
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        cls._compiled_error_messages = {
+            (field, error_type): message
+            for field, messages in cls.error_messages.items()
+            for error_type, message in messages.items()
+        }
 
     def __init__(self, /, **data: Any) -> None:
+        if not self._compiled_error_messages:
+            super().__init__(**data)
+            return
         try:
             super().__init__(**data)
         except ValidationError as e:
-            new_errors: list[InitErrorDetails] = []
-            for error in e.errors():
-                custom_message = self.error_messages.get(error["loc"][0], {}).get(error["type"])
-                ctx = error.get("ctx")
-                if custom_message:
-                    new_errors.append(
-                        InitErrorDetails(
-                            type=PydanticCustomError(
-                                error["type"],
-                                custom_message.format(**ctx) if ctx else custom_message,
-                            ),
-                            loc=error["loc"],
-                            input=error.get("input"),
-                            ctx=ctx,
-                        )
-                    )
-                else:
-                    new_errors.append(
-                        InitErrorDetails(
-                            type=PydanticCustomError(
-                                error["type"],
-                                error.get("msg"),
-                            ),
-                            loc=error["loc"],
-                            input=error.get("input"),
-                            ctx=ctx,
-                        )
-                    )
+            errors = e.errors(include_url=False)
+            messages = self._compiled_error_messages
+            if not any((error["loc"][0], error["type"]) in messages for error in errors):
+                raise
 
+            new_errors = _custom_errors(errors, messages)
             raise ValidationError.from_exception_data(title=self.__class__.__name__, line_errors=new_errors)
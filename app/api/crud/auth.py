@@ -1,43 +1,133 @@
 import datetime
+import uuid
+from typing import Any
 
-from sqlalchemy import func
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Insert, Row, Select, Update, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import SessionDep
+from app.api.deps import DBSessionDep, SessionDep
 from app.api.schemas.auth import UserRegisterSchema
 from app.core.config import settings
-from app.core.security import get_password_hash, verify_password
+from app.core.db import read_scalars
+from app.core.email_filter import email_filter
+from app.core.security import (
+    DUMMY_PASSWORD_HASH,
+    get_password_hash_async,
+    verify_password_async,
+)
 from app.models import User
-from app.sqltypes import decrypt
+from app.sqltypes import blind_index
 
+# The id, password hash, active flag and decrypted email of a user logging in
+LoginUser = Row[tuple[uuid.UUID, str, bool, str]]
 
-def get_user_by_email(session: SessionDep, *, email: str) -> User | None:
-    # Convert the provided email to lowercase for case-insensitive comparison
+
+def _user_by_email_query(email: str) -> Select[tuple[User]]:
+    # The blind index is computed on the lowercased email, so the lookup is case-insensitive
+    return select(User).where(User.email_bidx == email)
+
+
+def _login_query(email: str) -> Select[tuple[uuid.UUID, str, bool, str]]:
+    # Only the columns the login needs, so the row isn't loaded into the identity map
+    return select(User.id, User.password, User.is_active, User.email).where(User.email_bidx == email)
+
+
+def _record_login_query(user: LoginUser) -> Update:
+    # Matches nothing if the user was deactivated or changed password since the credentials were checked
     return (
-        session.query(User)
-        .filter(func.lower(decrypt(User.email)) == func.lower(email))
-        .first()
+        update(User)
+        .where(User.id == user.id, User.password == user.password, User.is_active)
+        .values(last_login=datetime.datetime.now(datetime.UTC))
+        .returning(User.id)
     )
 
 
-def authenticate(session: SessionDep, *, email: str, password: str) -> User | None:
-    user = get_user_by_email(session=session, email=email)
+def _insert_user_query(user_info: UserRegisterSchema, *, password_hash: str) -> Insert:
+    # A duplicate email hits the unique blind index and inserts nothing, so no id is returned.
+    # The blind index is set explicitly as ORM events don't run for Core inserts.
+    _now = datetime.datetime.now(datetime.UTC)
+    values: dict[str, Any] = {
+        "email": user_info.email,
+        "email_bidx": user_info.email,
+        "password": password_hash,
+        "gender": user_info.gender,
+        "date_joined": _now,
+        "last_login": _now,
+        "last_active": _now,
+        "key_version": settings.POSTGRES_ENCRYPTION_KEY_VERSION,
+    }
+    return (
+        insert(User)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[User.email_bidx])
+        .returning(User.id)
+    )
+
+
+def get_user_by_email(session: SessionDep, *, email: str) -> User | None:
+    return read_scalars(session, _user_by_email_query(email)).first()
+
+
+def _get_login_user(session: SessionDep, *, email: str) -> LoginUser | None:
+    return session.execute(_login_query(email)).first()
+
+
+def _insert_user(session: SessionDep, *, query: Insert) -> uuid.UUID | None:
+    user_id = session.scalar(query)
+    session.commit()
+    return user_id
+
+
+def record_login(session: SessionDep, *, user: LoginUser) -> bool:
+    """
+    Set `last_login` of an authenticated user and commit.
+
+    Returns:
+        bool: False if the user was deactivated or changed password in the meantime.
+    """
+    user_id = session.scalar(_record_login_query(user))
+    session.commit()
+    return user_id is not None
+
+
+# Async versions, used by the routes. When `DATABASE_MODE` is "sync" they receive a
+# plain `Session` and run the sync queries in the threadpool instead. Password hashing
+# always goes through the bounded hashing pool and may raise `PasswordHasherBusyError`.
+
+async def authenticate_async(session: DBSessionDep, *, email: str, password: str) -> LoginUser | None:
+    if not email_filter.might_exist(email):
+        user = None
+    elif not isinstance(session, AsyncSession):
+        user = await run_in_threadpool(_get_login_user, session, email=email)
+    else:
+        user = (await session.execute(_login_query(email))).first()
     if not user:
+        # As slow as a wrong password, so the response time doesn't tell whether the email exists
+        await verify_password_async(password, DUMMY_PASSWORD_HASH)
         return None
-    if not verify_password(password, user.password):
+    if not await verify_password_async(password, user.password):
         return None
     return user
 
 
-def create_user(session: SessionDep, *, user_info: UserRegisterSchema) -> None:
-    _now = datetime.datetime.now(datetime.UTC)
-    user = User(
-        email=user_info.email,
-        password=get_password_hash(user_info.password),
-        gender=user_info.gender,
-        date_joined=_now,
-        last_login=_now,
-        last_active=_now,
-        key_version=settings.POSTGRES_ENCRYPTION_KEY_VERSION
-    )
-    session.add(user)
-    session.commit()
+async def create_user_async(session: DBSessionDep, *, user_info: UserRegisterSchema) -> uuid.UUID | None:
+    query = _insert_user_query(user_info, password_hash=await get_password_hash_async(user_info.password))
+    if not isinstance(session, AsyncSession):
+        user_id = await run_in_threadpool(_insert_user, session, query=query)
+    else:
+        user_id = await session.scalar(query)
+        await session.commit()
+    if user_id:
+        # Other workers add it on the trigger's notification
+        email_filter.add(blind_index(user_info.email))
+    return user_id
+
+
+async def record_login_async(session: DBSessionDep, *, user: LoginUser) -> bool:
+    if not isinstance(session, AsyncSession):
+        return await run_in_threadpool(record_login, session, user=user)
+    user_id = await session.scalar(_record_login_query(user))
+    await session.commit()
+    return user_id is not None
@@ -0,0 +1,74 @@
+import csv
+import io
+import uuid
+from collections.abc import Iterator, Sequence
+from typing import Any, Literal
+
+from pydantic_core import to_json
+from sqlalchemy import Row, Select, select
+
+from app.core.db import database
+from app.models import User
+
+ExportFormat = Literal["csv", "ndjson"]
+
+EXPORT_FIELDS = ["id", "email", "gender", "is_active", "date_joined", "last_login", "last_active"]
+
+
+def _export_query(after: uuid.UUID | None) -> Select[Any]:
+    # Ordered by the primary key, so an interrupted export resumes after the last exported id.
+    # The email is decrypted by the database, see `EncryptedText`.
+    query = select(*(getattr(User, field) for field in EXPORT_FIELDS)).order_by(User.id)
+    if after is not None:
+        query = query.where(User.id > after)
+    return query
+
+
+def _render_csv(rows: Sequence[Row[Any]], *, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row_id, email, gender, is_active, date_joined, last_login, last_active = row
+        writer.writerow([
+            row_id, email, gender.value, is_active,
+            date_joined.isoformat(), last_login.isoformat(), last_active.isoformat(),
+        ])
+    return buffer.getvalue()
+
+
+def _render_ndjson(rows: Sequence[Row[Any]]) -> str:
+    return "".join(f"{to_json(row._asdict()).decode()}\n" for row in rows)
+
+
+def export_users(
+        export_format: ExportFormat, *, after: uuid.UUID | None = None, batch_size: int = 1000
+) -> Iterator[tuple[str, uuid.UUID | None]]:
+    """
+    Stream every user with the email decrypted, in chunks of `batch_size` rows.
+
+    The rows are read through a server-side cursor, so memory use doesn't depend on the size
+    of the table. The export is a snapshot: the cursor's transaction stays open until it ends.
+
+    Args:
+        export_format (str): "csv" (with a header row unless resuming) or "ndjson".
+        after (uuid.UUID | None): The last id of an interrupted export, to resume it.
+        batch_size (int): Rows fetched from the cursor and rendered at a time.
+
+    Yields:
+        tuple: A rendered chunk, and the id of its last user, the checkpoint to resume after it.
+    """
+    header = export_format == "csv" and after is None
+    with database.engine.connect() as connection:
+        result = connection.execution_options(yield_per=batch_size).execute(_export_query(after))
+        for rows in result.partitions():
+            if export_format == "csv":
+                chunk = _render_csv(rows, header=header)
+                header = False
+            else:
+                chunk = _render_ndjson(rows)
+            yield chunk, rows[-1].id
+    if header:
+        # No users to export
+        yield _render_csv([], header=True), after
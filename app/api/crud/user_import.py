@@ -0,0 +1,212 @@
+import csv
+import dataclasses
+import io
+import itertools
+import json
+import logging
+import multiprocessing
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Any, Literal
+
+from pydantic import ValidationError
+from sqlalchemy import (
+    Column,
+    LargeBinary,
+    MetaData,
+    Select,
+    Table,
+    Text,
+    func,
+    literal,
+    select,
+    true,
+)
+from sqlalchemy.dialects.postgresql import ENUM, insert
+from sqlalchemy.engine import Connection
+
+from app.api.schemas.admin import UserImportSchema
+from app.common.enums import GenderEnum
+from app.core.config import settings
+from app.core.db import database
+from app.core.security import get_password_hash
+from app.models import User
+from app.sqltypes import blind_index, encrypt
+
+logger = logging.getLogger(__name__)
+
+ImportFormat = Literal["csv", "ndjson"]
+
+# Validation errors kept in the result, the rest are only counted
+MAX_ERRORS = 100
+
+# Rows are copied here first and merged into the user table in one statement. The email is
+# kept in plaintext only inside the transaction, it is encrypted by the merge.
+staging_table = Table(
+    "user_import",
+    MetaData(),
+    Column("email", Text(), nullable=False),
+    Column("email_bidx", LargeBinary(), nullable=False),
+    Column("password", Text(), nullable=False),
+    Column("gender", ENUM(name="gender_enum", create_type=False), nullable=False),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+
+@dataclasses.dataclass
+class ImportResult:
+    rows: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: list[str] = dataclasses.field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def add_error(self, line: int, message: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"Line {line}: {message}")
+
+
+def read_rows(stream: IO[bytes], import_format: ImportFormat) -> Iterator[tuple[int, dict[str, Any] | None]]:
+    """
+    Parse a CSV file with a header row, or one JSON object per line, one row at a time.
+
+    Yields:
+        tuple: The line number and the row, or None if the line can't be parsed.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if import_format == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Empty cells are missing values, cells without a header are ignored
+            yield reader.line_num, {key: value for key, value in row.items() if key is not None and value != ""}
+        return
+    for line, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError:
+            row = None
+        yield line, row if isinstance(row, dict) else None
+
+
+def validate_rows(
+        rows: Iterable[tuple[int, dict[str, Any] | None]], result: ImportResult
+) -> Iterator[UserImportSchema]:
+    for line, row in rows:
+        result.rows += 1
+        if row is None:
+            result.add_error(line, "Invalid row")
+            continue
+        try:
+            yield UserImportSchema.model_validate(row)
+        except ValidationError as e:
+            error = e.errors(include_url=False)[0]
+            field = ".".join(str(loc) for loc in error["loc"])
+            result.add_error(line, f"{field}: {error['msg']}" if field else error["msg"])
+
+
+def _batches(users: Iterable[UserImportSchema], size: int) -> Iterator[list[UserImportSchema]]:
+    iterator = iter(users)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def _merge_query() -> Select[tuple[int]]:
+    # Duplicates of registered emails, and within the import, are skipped by the unique blind index.
+    # Counted in a CTE, as the row count of `INSERT ... SELECT` isn't reported.
+    merged = insert(User).from_select(
+        ["id", "email", "email_bidx", "password", "gender", "is_active", "key_version"],
+        staging_table.select().with_only_columns(
+            func.gen_random_uuid(),
+            encrypt(staging_table.c.email),
+            staging_table.c.email_bidx,
+            staging_table.c.password,
+            staging_table.c.gender,
+            true(),
+            literal(settings.POSTGRES_ENCRYPTION_KEY_VERSION),
+        ),
+    ).on_conflict_do_nothing(index_elements=[User.email_bidx]).returning(User.id).cte("merged")
+    return select(func.count()).select_from(merged)
+
+
+def _copy_rows(connection: Connection, batches: Iterable[tuple[list[UserImportSchema], Iterator[str]]]) -> int:
+    staged = 0
+    cursor = connection.connection.driver_connection.cursor()  # type: ignore[union-attr]
+    with cursor.copy(f"COPY {staging_table.name} (email, email_bidx, password, gender) FROM STDIN") as copy:
+        for users, hashes in batches:
+            for user in users:
+                copy.write_row((
+                    user.email,
+                    blind_index(user.email),
+                    user.password_hash or next(hashes),
+                    GenderEnum(user.gender).name,
+                ))
+            staged += len(users)
+            logger.info(f"Staged {staged} users")
+    return staged
+
+
+def import_users(
+        stream: IO[bytes], *, import_format: ImportFormat, batch_size: int = 1000, hash_workers: int = 2
+) -> ImportResult:
+    """
+    Create users from a CSV or NDJSON stream, reading it in batches so memory use doesn't
+    depend on its size.
+
+    Each row is validated with `UserImportSchema`. Plaintext passwords are hashed in a process
+    pool while the previous batch is copied into a temporary staging table, from which the users
+    are merged into the user table in one statement at the end, so the import is all or nothing
+    (apart from invalid rows and already registered emails, which are skipped).
+
+    Args:
+        stream (IO[bytes]): The file to import, the CSV header names the fields of `UserImportSchema`.
+        import_format (str): "csv" or "ndjson".
+        batch_size (int): Rows hashed and copied at a time.
+        hash_workers (int): Processes hashing the plaintext passwords.
+
+    Returns:
+        ImportResult: The row counts, the first validation errors and the duration.
+    """
+    start = time.perf_counter()
+    result = ImportResult()
+    # Processes are only started once a plaintext password is submitted
+    with ProcessPoolExecutor(
+        max_workers=hash_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor, database.engine.begin() as connection:
+
+        def hashed(users: list[UserImportSchema]) -> Iterator[str]:
+            # Submits the whole batch right away, the hashes are collected while copying it
+            passwords = [user.password for user in users if user.password_hash is None]
+            return executor.map(get_password_hash, passwords, chunksize=max(1, len(passwords) // (hash_workers * 4)))
+
+        def pipelined() -> Iterator[tuple[list[UserImportSchema], Iterator[str]]]:
+            # Hashing one batch ahead of the copy keeps the pool busy
+            previous = None
+            for users in _batches(validate_rows(read_rows(stream, import_format), result), batch_size):
+                current = users, hashed(users)
+                if previous is not None:
+                    yield previous
+                previous = current
+            if previous is not None:
+                yield previous
+
+        staging_table.create(connection)
+        staged = _copy_rows(connection, pipelined())
+        result.imported = connection.execute(_merge_query()).scalar_one()
+        result.duplicates = staged - result.imported
+
+    result.seconds = time.perf_counter() - start
+    logger.info(
+        f"Imported {result.imported} of {result.rows} users in {result.seconds:.1f}s "
+        f"({result.rows_per_second:.0f} rows/s), {result.duplicates} duplicates, {result.invalid} invalid"
+    )
+    return result
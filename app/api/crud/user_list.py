@@ -0,0 +1,120 @@
+import base64
+import datetime
+import uuid
+from collections.abc import Sequence
+from typing import Any
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import ColumnElement, Select, TextClause, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import DBSessionDep, SessionDep
+from app.common.enums import GenderEnum
+from app.core.db import read_scalars, read_scalars_async
+from app.models import User
+
+# The position of the last user of a page, (date_joined, id)
+Cursor = tuple[datetime.datetime, uuid.UUID]
+
+
+def encode_cursor(user: User) -> str:
+    return base64.urlsafe_b64encode(f"{user.date_joined.isoformat()},{user.id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    Raises:
+        ValueError: If the cursor wasn't made by `encode_cursor`.
+    """
+    date_joined, _, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition(",")
+    return datetime.datetime.fromisoformat(date_joined), uuid.UUID(user_id)
+
+
+def _filters(is_active: bool | None, gender: GenderEnum | None) -> list[ColumnElement[bool]]:
+    filters = []
+    if is_active is not None:
+        filters.append(User.is_active == is_active)
+    if gender is not None:
+        filters.append(User.gender == gender)
+    return filters
+
+
+def _list_query(
+        *, limit: int, after: Cursor | None, is_active: bool | None, gender: GenderEnum | None
+) -> Select[tuple[User]]:
+    # Newest first. Seeking past the cursor is an index range scan on (date_joined, id), or on
+    # (is_active | gender, date_joined, id) when filtering, however deep the page is.
+    query = select(User).where(*_filters(is_active, gender))
+    if after is not None:
+        query = query.where(tuple_(User.date_joined, User.id) < tuple_(*after))
+    # One more than the page, to know whether there is a next one
+    return query.order_by(User.date_joined.desc(), User.id.desc()).limit(limit + 1)
+
+
+# Counting the users is a scan of the whole table or index, so totals are the planner's estimates
+# instead: the row count of the table as of its last ANALYZE, or the rows the plan of the filtered
+# query expects (also when the table was never analyzed).
+
+
+def _reltuples_query() -> TextClause:
+    return text("SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)").bindparams(
+        table=f'{User.__table__.schema}."{User.__tablename__}"'
+    )
+
+
+def _explain_query(is_active: bool | None, gender: GenderEnum | None) -> TextClause:
+    # The filters are booleans and enum members, rendered inline as EXPLAIN takes no parameters
+    query = select(User.id).where(*_filters(is_active, gender)).compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    return text(f"EXPLAIN (FORMAT JSON) {query}")
+
+
+def _plan_rows(plan: list[dict[str, Any]]) -> int:
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _page(users: Sequence[User], limit: int) -> tuple[list[User], str | None]:
+    if len(users) > limit:
+        return list(users[:limit]), encode_cursor(users[limit - 1])
+    return list(users), None
+
+
+def list_users(
+        session: SessionDep, *, limit: int, after: Cursor | None = None,
+        is_active: bool | None = None, gender: GenderEnum | None = None,
+) -> tuple[list[User], str | None, int]:
+    """
+    Returns:
+        tuple: The users of the page, the cursor of the next page (None on the last one),
+            and the estimated number of users matching the filters.
+    """
+    users = read_scalars(
+        session, _list_query(limit=limit, after=after, is_active=is_active, gender=gender)
+    ).all()
+    if is_active is None and gender is None and (reltuples := read_scalars(session, _reltuples_query()).one()) >= 0:
+        total = int(reltuples)
+    else:
+        total = _plan_rows(read_scalars(session, _explain_query(is_active, gender)).one())
+    return *_page(users, limit), total
+
+
+async def list_users_async(
+        session: DBSessionDep, *, limit: int, after: Cursor | None = None,
+        is_active: bool | None = None, gender: GenderEnum | None = None,
+) -> tuple[list[User], str | None, int]:
+    if not isinstance(session, AsyncSession):
+        return await run_in_threadpool(
+            list_users, session, limit=limit, after=after, is_active=is_active, gender=gender
+        )
+    users = (await read_scalars_async(
+        session, _list_query(limit=limit, after=after, is_active=is_active, gender=gender)
+    )).all()
+    if is_active is None and gender is None and (
+            (reltuples := (await read_scalars_async(session, _reltuples_query())).one()) >= 0
+    ):
+        total = int(reltuples)
+    else:
+        total = _plan_rows((await read_scalars_async(session, _explain_query(is_active, gender))).one())
+    return *_page(users, limit), total
@@ -1,58 +1,104 @@
+import dataclasses
 import datetime
-import json
+import hmac
 from typing import Annotated, Any
 
 import jwt
-import requests
 from fastapi import Depends, HTTPException
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import APIKeyHeader, HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.session import Session
 
 from app.core import security
+from app.core.activity import last_active_buffer
 from app.core.config import settings
-from app.core.db import get_db
+from app.core.db import get_async_db, get_db
+from app.core.remote_auth import RemoteAuthError, remote_auth_client
+from app.core.user_cache import UserSnapshot, user_cache
 from app.models import User
 
 reusable_http = HTTPBearer()
+admin_key_header = APIKeyHeader(name="X-Admin-Key", auto_error=False)
 
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+# Session used by the routes, selected by `DATABASE_MODE`
+DBSessionDep = Annotated[
+    Session | AsyncSession,
+    Depends(get_async_db if settings.DATABASE_MODE == "async" else get_db)
+]
 TokenDep = Annotated[HTTPAuthorizationCredentials, Depends(reusable_http)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> Any:
-    # From same service
+def decode_token(token: TokenDep) -> dict[str, Any]:
     try:
-        payload = jwt.decode(
-            token.credentials, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
+        return security.decode_access_token(token.credentials)
     except jwt.PyJWTError:
         raise HTTPException(status_code=403, detail="Could not validate credentials")
-    user = session.query(User).filter(User.id == payload["sub"]).first()
+
+
+def check_user(user: UserSnapshot | None) -> UserSnapshot:
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    user.last_active = datetime.datetime.now(datetime.UTC)
-    session.commit()
     return user
 
-    # From another service
-    # response = requests.get(
-    #     settings.AUTH_URL,
-    #     headers={"Authorization": f"Bearer {token.credentials}"}
-    # )
-    # if response.status_code == 200:
-    #     return response.json()
-    #
-    # try:
-    #     response_json = response.json()
-    # except json.JSONDecodeError:
-    #     raise HTTPException(status_code=500, detail="Internal Server Error")
-    #
-    # if response_json.get("detail"):
-    #     raise HTTPException(status_code=response.status_code, detail=response_json.get("detail"))
-    # else:
-    #     raise HTTPException(status_code=403, detail="Invalid credentials")
-
-
-CurrentUser = Annotated[Any, Depends(get_current_user)]
+
+def touch_user(user: UserSnapshot) -> UserSnapshot:
+    # Buffered and written in batches, the cached snapshot follows what will be stored
+    _now = datetime.datetime.now(datetime.UTC)
+    if last_active_buffer.touch(user.id, _now, stored=user.last_active):
+        user_cache.update(str(user.id), dataclasses.replace(user, last_active=_now))
+    return dataclasses.replace(user, last_active=_now)
+
+
+def get_current_user(session: SessionDep, token: TokenDep) -> Any:
+    payload = decode_token(token)
+    user = user_cache.get(payload["sub"])
+    if user is None:
+        # Taken before the query, an invalidation meanwhile then keeps the stale snapshot out
+        generation = user_cache.generation
+        # Read from the primary rather than a replica: after a change evicted the user from the cache,
+        # a lagging replica would cache its previous state, e.g. `is_active`, for the whole TTL
+        db_user = session.scalars(select(User).where(User.id == payload["sub"])).first()
+        if db_user:
+            user = user_cache.set(payload["sub"], UserSnapshot.from_user(db_user), generation=generation)
+    return touch_user(check_user(user))
+
+
+async def get_current_user_async(session: DBSessionDep, token: TokenDep) -> Any:
+    if not isinstance(session, AsyncSession):
+        # Sync mode, keep the blocking session off the event loop
+        return await run_in_threadpool(get_current_user, session, token)
+
+    payload = decode_token(token)
+    user = user_cache.get(payload["sub"])
+    if user is None:
+        generation = user_cache.generation
+        db_user = (await session.scalars(select(User).where(User.id == payload["sub"]))).first()
+        if db_user:
+            user = user_cache.set(payload["sub"], UserSnapshot.from_user(db_user), generation=generation)
+    return touch_user(check_user(user))
+
+
+async def get_remote_user(token: TokenDep) -> Any:
+    # From another service, see `AUTH_MODE`
+    try:
+        return await remote_auth_client.get_user(token.credentials)
+    except RemoteAuthError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+CurrentUser = Annotated[
+    Any,
+    Depends(get_remote_user if settings.AUTH_MODE == "remote" else get_current_user_async)
+]
+
+
+def check_admin_key(key: Annotated[str | None, Depends(admin_key_header)]) -> None:
+    # Without `ADMIN_API_KEY` the admin endpoints are disabled
+    if not settings.ADMIN_API_KEY or not key or not hmac.compare_digest(key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="Could not validate credentials")
@@ -0,0 +1,63 @@
+from collections.abc import Iterable
+from typing import Any
+
+from fastapi.dependencies.utils import get_flat_dependant
+from fastapi.routing import APIRoute
+from starlette.routing import BaseRoute
+
+# Messages of query and path parameter errors by error type. `{name}` is the parameter name with
+# spaces, `{Name}` the same capitalized, and `{input}` the invalid value.
+PARAMETER_ERROR_MESSAGES = {
+    "missing": "{Name} is required",
+    "string_pattern_mismatch": "Please enter a valid {name}",
+    "greater_than": "{Name} should be greater than {input}",
+    "less_than": "{Name} should be less than {input}",
+    "uuid_parsing": "Invalid {name}!",
+}
+
+
+class ValidationErrorMessages:
+    """
+    The custom messages of request validation errors, looked up by (loc, type).
+
+    The messages of the parameters of the app's routes are rendered once by `build`,
+    so formatting an error is a dict lookup.
+    """
+
+    def __init__(self) -> None:
+        # (loc, type) -> the message, or a 1-tuple with the text before the invalid input
+        self._messages: dict[tuple[tuple[Any, ...], str], str | tuple[str]] = {}
+
+    def add_parameter(self, location: str, name: str) -> None:
+        spaced = name.replace("_", " ")
+        for error_type, template in PARAMETER_ERROR_MESSAGES.items():
+            message = template.replace("{Name}", spaced.capitalize()).replace("{name}", spaced)
+            # The input is always last in the templates
+            self._messages[(location, name), error_type] = (
+                (message.removesuffix("{input}"),) if message.endswith("{input}") else message
+            )
+
+    def build(self, routes: Iterable[BaseRoute]) -> None:
+        for route in routes:
+            if isinstance(route, APIRoute):
+                dependant = get_flat_dependant(route.dependant)
+                for param in dependant.query_params:
+                    self.add_parameter("query", param.alias)
+                for param in dependant.path_params:
+                    self.add_parameter("path", param.alias)
+
+    def get(self, error: dict[str, Any]) -> str:
+        message = self._messages.get((error["loc"], error["type"]))
+        if message is None:
+            loc = error["loc"]
+            if loc[0] not in ("query", "path") or error["type"] not in PARAMETER_ERROR_MESSAGES or len(loc) != 2:
+                return error["msg"]
+            # A parameter of a route added after `build`
+            self.add_parameter(loc[0], loc[1])
+            return self.get(error)
+        if type(message) is str:
+            return message
+        return f"{message[0]}{error.get('input')}"
+
+
+validation_error_messages = ValidationErrorMessages()
@@ -1,6 +1,14 @@
 from fastapi import APIRouter
 
-from app.api.routes import auth
+from app.api.routes import admin, auth, metrics, well_known
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="", tags=["Auth"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
+
+# Served at the root of the service instead of under the API version
+well_known_router = APIRouter()
+well_known_router.include_router(well_known.router, prefix="", tags=["Well Known"])
+
+metrics_router = APIRouter()
+metrics_router.include_router(metrics.router, prefix="", tags=["Metrics"])
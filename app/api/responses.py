@@ -0,0 +1,16 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response serialized by pydantic-core in a single pass.
+
+    Pydantic models, UUIDs, datetimes and enums are serialized directly, so the content
+    doesn't need to go through `jsonable_encoder` first.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
@@ -0,0 +1,132 @@
+import dataclasses
+import tempfile
+import traceback
+import uuid
+from collections.abc import Iterator
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.requests import Request
+from fastapi.responses import Response, StreamingResponse
+
+from app.api.crud import user_export, user_import, user_list
+from app.api.deps import DBSessionDep, check_admin_key
+from app.api.responses import FastJSONResponse
+from app.api.schemas.admin import (
+    UserImportResponseSchema,
+    UserImportResultSchema,
+    UserListDataSchema,
+    UserListItemSchema,
+    UserListResponseSchema,
+)
+from app.common.enums import GenderEnum
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+router = APIRouter(dependencies=[Depends(check_admin_key)])
+logger = get_logger(__name__)
+
+# Request bodies larger than this are spooled to disk while they are received
+IMPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@router.post("/users/import", summary="Import Users", response_model=UserImportResponseSchema)
+async def import_users(
+        request: Request,
+        import_format: Annotated[user_import.ImportFormat, Query(alias="format")] = "csv",
+) -> Response:
+    """
+    Create users from a CSV body with a header row, or one JSON object per line, each with an email,
+    gender and either a password or a bcrypt `password_hash`. Invalid rows and registered emails are skipped.
+    """
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as file:
+            async for chunk in request.stream():
+                file.write(chunk)
+            file.seek(0)
+            result = await run_in_threadpool(
+                user_import.import_users,
+                file,
+                import_format=import_format,
+                batch_size=settings.USER_IMPORT_BATCH_SIZE,
+                hash_workers=settings.USER_IMPORT_HASH_WORKERS,
+            )
+    except Exception as e:
+        logger.error(f"Unexpected error while importing users: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    return FastJSONResponse(
+        UserImportResponseSchema(
+            data=UserImportResultSchema(**dataclasses.asdict(result), rows_per_second=result.rows_per_second),
+            detail="Users imported"
+        ),
+        status_code=200
+    )
+
+
+@router.get("/users/export", summary="Export Users")
+async def export_users(
+        export_format: Annotated[user_export.ExportFormat, Query(alias="format")] = "ndjson",
+        after: Annotated[uuid.UUID | None, Query(description="Id of the last user received, to resume")] = None,
+) -> Response:
+    """
+    Stream every user with the email decrypted, ordered by id. An interrupted export is resumed
+    by passing the id of the last user received as `after`.
+    """
+
+    def content() -> Iterator[str]:
+        # Run in the threadpool by the response, one chunk of users at a time
+        for chunk, _last_id in user_export.export_users(export_format, after=after):
+            yield chunk
+
+    return StreamingResponse(
+        content(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="users.{export_format}"'}
+    )
+
+
+@router.get("/users", summary="List Users", response_model=UserListResponseSchema)
+async def list_users(
+        session: DBSessionDep,
+        limit: Annotated[int, Query(gt=0, lt=101)] = 50,
+        cursor: Annotated[str | None, Query(description="`next_cursor` of the previous page")] = None,
+        is_active: bool | None = None,
+        gender: GenderEnum | None = None,
+) -> Response:
+    """
+    List users, newest first, a page at a time. The total is an estimate from the query planner.
+    """
+    try:
+        after = user_list.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return FastJSONResponse({"detail": "Invalid cursor"}, status_code=400)
+
+    users, next_cursor, estimated_total = await user_list.list_users_async(
+        session, limit=limit, after=after, is_active=is_active, gender=gender
+    )
+    return FastJSONResponse(
+        UserListResponseSchema(
+            data=UserListDataSchema(
+                users=[
+                    UserListItemSchema(
+                        user_id=user.id,
+                        email=user.email,
+                        gender=user.gender,
+                        is_active=user.is_active,
+                        date_joined=user.date_joined,
+                        last_login=user.last_login,
+                        last_active=user.last_active,
+                    )
+                    for user in users
+                ],
+                next_cursor=next_cursor,
+                estimated_total=estimated_total,
+            )
+        ),
+        status_code=200
+    )
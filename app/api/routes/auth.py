@@ -1,92 +1,129 @@
 import datetime
+import math
 import traceback
 
 from fastapi import APIRouter, HTTPException
-from fastapi.encoders import jsonable_encoder
 from fastapi.requests import Request
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import Response
 
 from app.api.crud import auth
-from app.api.deps import CurrentUser, SessionDep
-from app.api.schemas.auth import UserRegisterSchema, UserSchema
+from app.api.deps import CurrentUser, DBSessionDep
+from app.api.responses import FastJSONResponse
+from app.api.schemas.auth import (
+    LoginDataSchema,
+    LoginResponseSchema,
+    UserMeDataSchema,
+    UserMeResponseSchema,
+    UserRegisterSchema,
+    UserSchema,
+)
 from app.core.config import settings
-from app.core.security import create_access_token
+from app.core.rate_limit import auth_rate_limiter
+from app.core.security import PasswordHasherBusyError, create_access_token
 from app.utils.logger import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 
+def client_ip(request: Request) -> str | None:
+    # The IP of the proxy, unless it is listed in FORWARDED_ALLOW_IPS (see `scripts/gunicorn_conf.py`)
+    return request.client.host if request.client else None
+
+
+def check_rate_limit(request: Request, action: str, *, email: str) -> Response | None:
+    """
+    Returns:
+        Response | None: A 429 response if the client made too many attempts, or failed ones with the email.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    retry_after = auth_rate_limiter.retry_after(action, ip=client_ip(request), email=email)
+    if not retry_after:
+        return None
+    return FastJSONResponse(
+        {"detail": "Too many attempts, please try again later"},
+        status_code=429,
+        headers={"Retry-After": str(math.ceil(retry_after))}
+    )
+
+
+def record_failed_attempt(request: Request, action: str, *, email: str) -> None:
+    if settings.RATE_LIMIT_ENABLED:
+        auth_rate_limiter.record_failure(action, ip=client_ip(request), email=email)
+
+
 @router.post("/register", summary="User Registration")
-async def register_user(request: Request, session: SessionDep, body: UserRegisterSchema) -> Response:
+async def register_user(request: Request, session: DBSessionDep, body: UserRegisterSchema) -> Response:
     """
     Register a new user by providing an email, password, and gender.
     """
+    if response := check_rate_limit(request, "register", email=body.email):
+        return response
     try:
-        user = auth.get_user_by_email(session, email=body.email)
-        if user:
-            return JSONResponse({"detail": "The user with this email already exists"}, status_code=400)
-
-        auth.create_user(session, user_info=body)
-        return JSONResponse({"detail": "User registered successfully"}, status_code=201)
+        user_id = await auth.create_user_async(session, user_info=body)
+        if user_id is None:
+            record_failed_attempt(request, "register", email=body.email)
+            return FastJSONResponse({"detail": "The user with this email already exists"}, status_code=400)
+        return FastJSONResponse({"detail": "User registered successfully"}, status_code=201)
+    except PasswordHasherBusyError:
+        return FastJSONResponse(
+            {"detail": "Service is busy, please try again later"}, status_code=503, headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error(f"Unexpected error while user registration: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.post("/login", summary="User Login")
-async def login(request: Request, session: SessionDep, body: UserSchema) -> Response:
+@router.post("/login", summary="User Login", response_model=LoginResponseSchema)
+async def login(request: Request, session: DBSessionDep, body: UserSchema) -> Response:
     """
     Authenticate a user and obtain an access token by providing an email and password.
     """
+    if response := check_rate_limit(request, "login", email=body.email):
+        return response
     try:
-        user = auth.authenticate(session, email=body.email, password=body.password)
+        user = await auth.authenticate_async(session, email=body.email, password=body.password)
         if not user:
-            return JSONResponse({"detail": "Incorrect email or password"}, status_code=400)
-        elif not user.is_active:
-            return JSONResponse({"detail": "Inactive user"}, status_code=400)
+            record_failed_attempt(request, "login", email=body.email)
+            return FastJSONResponse({"detail": "Incorrect email or password"}, status_code=400)
+        elif not user.is_active or not await auth.record_login_async(session, user=user):
+            return FastJSONResponse({"detail": "Inactive user"}, status_code=400)
 
         access_token_expires = datetime.timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(str(user.id), expires_delta=access_token_expires)
-
-        _now = datetime.datetime.now(datetime.UTC)
-        user.last_login = _now
-        session.commit()
-        return JSONResponse(
-            jsonable_encoder(
-                {
-                    "data": {
-                        "email": user.email,
-                        "access_token": access_token,
-                    },
-                    "detail": "Login successfully"
-                }
+        return FastJSONResponse(
+            LoginResponseSchema(
+                data=LoginDataSchema(email=user.email, access_token=access_token),
+                detail="Login successfully"
             ),
             status_code=200
         )
+    except PasswordHasherBusyError:
+        return FastJSONResponse(
+            {"detail": "Service is busy, please try again later"}, status_code=503, headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error(f"Unexpected error while user login: {str(e)}")
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.get("/me", summary="Retrieve User Information")
-async def user_me(request: Request, session: SessionDep, current_user: CurrentUser) -> Response:
+@router.get("/me", summary="Retrieve User Information", response_model=UserMeResponseSchema)
+async def user_me(request: Request, session: DBSessionDep, current_user: CurrentUser) -> Response:
     """
     Retrieve the authenticated user's details.
     """
-    return JSONResponse(
-        jsonable_encoder(
-            {
-                "data": {
-                    "user_id": current_user.id,
-                    "email": current_user.email,
-                    "date_joined": current_user.date_joined,
-                    "last_login": current_user.last_login,
-                    "last_active": current_user.last_active,
-                },
-            }
+    return FastJSONResponse(
+        UserMeResponseSchema(
+            data=UserMeDataSchema(
+                user_id=current_user.id,
+                email=current_user.email,
+                date_joined=current_user.date_joined,
+                last_login=current_user.last_login,
+                last_active=current_user.last_active,
+            )
         ),
         status_code=200
     )
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+
+from app.core.metrics import CONTENT_TYPE, render
+
+router = APIRouter()
+
+
+@router.get("/metrics", summary="Prometheus Metrics")
+async def metrics() -> Response:
+    """
+    Retrieve the metrics of all workers of the service in the Prometheus text format.
+    """
+    # Reading the files of every worker is blocking IO
+    return Response(await run_in_threadpool(render), media_type=CONTENT_TYPE)
@@ -0,0 +1,23 @@
+import json
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.core.security import get_jwks
+
+router = APIRouter()
+
+# The key set only changes with the configuration, so it is serialized once
+JWKS_CONTENT = json.dumps(get_jwks()).encode()
+
+
+@router.get("/.well-known/jwks.json", summary="JSON Web Key Set")
+async def jwks() -> Response:
+    """
+    Retrieve the public keys other services use to verify access tokens without calling this service.
+    """
+    return Response(
+        JWKS_CONTENT,
+        media_type="application/json",
+        headers={"Cache-Control": "public, max-age=3600"}
+    )
@@ -0,0 +1,68 @@
+import datetime
+import uuid
+
+from pydantic import Field, field_validator, model_validator
+
+from app.api.base_model import BaseModel
+from app.api.schemas.auth import UserRegisterSchema
+from app.common.enums import GenderEnum
+
+# A bcrypt hash as made by `get_password_hash`, i.e. of the hex SHA-256 of the password
+BCRYPT_HASH_PATTERN = r"^\$2[aby]\$(0[4-9]|[12][0-9]|3[01])\$[./A-Za-z0-9]{53}$"
+
+
+class UserImportSchema(UserRegisterSchema):
+    """ A row of a user import, with either a plaintext password or a bcrypt hash of it """
+
+    password: str | None = Field(
+        default=None, title="Plaintext password of the user", examples=["12345"]
+    )
+    password_hash: str | None = Field(
+        default=None, title="Bcrypt hash of the password", pattern=BCRYPT_HASH_PATTERN
+    )
+
+    @field_validator("gender")
+    @classmethod
+    def check_gender(cls, v: str) -> str:
+        return GenderEnum(v).value
+
+    @model_validator(mode="after")
+    def check_password(self) -> "UserImportSchema":
+        if (self.password is None) == (self.password_hash is None):
+            raise ValueError("Either password or password_hash is required")
+        return self
+
+
+class UserImportResultSchema(BaseModel):
+    rows: int = Field(title="Rows read")
+    imported: int = Field(title="Users created")
+    duplicates: int = Field(title="Valid rows skipped as their email is already registered")
+    invalid: int = Field(title="Rows that failed validation")
+    errors: list[str] = Field(title="The first validation errors, with their line numbers")
+    seconds: float = Field(title="Duration of the import")
+    rows_per_second: float = Field(title="Throughput of the import")
+
+
+class UserImportResponseSchema(BaseModel):
+    data: UserImportResultSchema
+    detail: str = Field(title="Result of the request", examples=["Users imported"])
+
+
+class UserListItemSchema(BaseModel):
+    user_id: uuid.UUID = Field(title="Id of the user")
+    email: str = Field(title="Email of the user", examples=["johndoe@gmail.com"])
+    gender: str = Field(title="Gender of the user", examples=[GenderEnum.MALE])
+    is_active: bool = Field(title="Whether the user may log in")
+    date_joined: datetime.datetime = Field(title="Time the user registered")
+    last_login: datetime.datetime = Field(title="Time the user last logged in")
+    last_active: datetime.datetime = Field(title="Time the user was last active")
+
+
+class UserListDataSchema(BaseModel):
+    users: list[UserListItemSchema]
+    next_cursor: str | None = Field(title="Cursor of the next page, null on the last page")
+    estimated_total: int = Field(title="Planner estimate of the users matching the filters")
+
+
+class UserListResponseSchema(BaseModel):
+    data: UserListDataSchema
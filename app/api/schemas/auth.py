@@ -1,3 +1,6 @@
+import datetime
+import uuid
+
 from pydantic import ConfigDict, EmailStr, Field, field_validator
 
 from app.api.base_model import BaseModel
@@ -27,3 +30,25 @@ class UserRegisterSchema(UserSchema):
         examples=[GenderEnum.MALE],
         enum=get_enum_values(GenderEnum)
     )
+
+
+class LoginDataSchema(BaseModel):
+    email: str = Field(title="Email of the user", examples=["johndoe@gmail.com"])
+    access_token: str = Field(title="Access token to send as a bearer token")
+
+
+class LoginResponseSchema(BaseModel):
+    data: LoginDataSchema
+    detail: str = Field(title="Result of the request", examples=["Login successfully"])
+
+
+class UserMeDataSchema(BaseModel):
+    user_id: uuid.UUID = Field(title="Id of the user")
+    email: str = Field(title="Email of the user", examples=["johndoe@gmail.com"])
+    date_joined: datetime.datetime = Field(title="Time the user registered")
+    last_login: datetime.datetime = Field(title="Time the user last logged in")
+    last_active: datetime.datetime = Field(title="Time the user was last active")
+
+
+class UserMeResponseSchema(BaseModel):
+    data: UserMeDataSchema
@@ -3,7 +3,7 @@ import logging
 from sqlalchemy import text
 from tenacity import after_log, before_log, retry, stop_after_attempt, wait_fixed
 
-from app.core.db import SessionLocal
+from app.core.db import database
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,7 +19,7 @@ wait_seconds = 1
     after=after_log(logger, logging.WARN),
 )
 def init() -> None:
-    session = SessionLocal()
+    session = database.session_factory()
 
     try:
         session.execute(text("SELECT 1"))
@@ -0,0 +1,6 @@
+# Postgres NOTIFY channel that receives the id of a user whenever the user row changes
+USER_CHANGED_CHANNEL = "user_changed"
+
+# Postgres NOTIFY channel that receives the hex encoded email blind index of every registered
+# user, and of every new email of an existing user
+USER_REGISTERED_CHANNEL = "user_registered"
@@ -0,0 +1,97 @@
+import asyncio
+import datetime
+import logging
+import threading
+import uuid
+
+from sqlalchemy import DateTime, column, update, values
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.config import settings
+from app.core.db import database
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class LastActiveBuffer:
+    """
+    Coalesces `User.last_active` updates in memory and writes them in batches.
+
+    Only the latest timestamp per user is kept, and a timestamp is only recorded when the
+    stored one is older than `precision`, so authenticated reads don't become write transactions.
+    """
+
+    def __init__(self, *, precision: datetime.timedelta):
+        self.precision = precision
+        self._pending: dict[uuid.UUID, datetime.datetime] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, user_id: uuid.UUID, last_active: datetime.datetime, /, *, stored: datetime.datetime) -> bool:
+        """
+        Record activity of a user.
+
+        Args:
+            user_id (uuid.UUID): The id of the user.
+            last_active (datetime.datetime): The time of the activity.
+            stored (datetime.datetime): The `last_active` currently stored in the database.
+
+        Returns:
+            bool: True if the activity was recorded, False if the stored timestamp is recent enough.
+        """
+        if last_active - stored < self.precision:
+            return False
+        with self._lock:
+            if self._pending.get(user_id, stored) <= last_active:
+                self._pending[user_id] = last_active
+        return True
+
+    def flush(self) -> int:
+        """
+        Write the pending timestamps as a single `UPDATE ... FROM (VALUES ...)` statement.
+
+        Returns:
+            int: The number of users flushed.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        rows = values(
+            column("id", UUID(as_uuid=True)),
+            column("last_active", DateTime(timezone=True)),
+            name="pending"
+        ).data(list(pending.items()))
+        stmt = (
+            update(User)
+            .where(User.id == rows.c.id, User.last_active < rows.c.last_active)
+            .values(last_active=rows.c.last_active)
+        )
+        try:
+            with database.engine.begin() as connection:
+                connection.execute(stmt)
+        except Exception:
+            # Put the batch back unless newer activity arrived in the meantime
+            with self._lock:
+                for user_id, last_active in pending.items():
+                    if self._pending.get(user_id, last_active) <= last_active:
+                        self._pending[user_id] = last_active
+            raise
+        return len(pending)
+
+    async def flush_periodically(self, interval: float) -> None:
+        """
+        Flush the buffer every `interval` seconds until cancelled.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"Unable to flush last active timestamps: {str(e)}")
+
+
+last_active_buffer = LastActiveBuffer(
+    precision=datetime.timedelta(seconds=settings.LAST_ACTIVE_PRECISION)
+)
@@ -16,7 +16,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 def parse_cors(v: list[str] | str) -> list[str] | str:
     if isinstance(v, str) and not v.startswith("["):
         return [i.strip() for i in v.split(",")]
-    elif isinstance(v, list | str):
+    elif isinstance(v, (list, str)):
         return v
     raise ValueError(v)
 
@@ -28,14 +28,75 @@ class Settings(BaseSettings):
     SERVICE_NAME: str = ""
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = "changethis"
+    # "local" authenticates against this service's database, "remote" asks the
+    # auth service at AUTH_URL, for services that don't own the user table
+    AUTH_MODE: Literal["local", "remote"] = "local"
     AUTH_URL: str = "http://127.0.0.1:5000/api/v1/me"
+    AUTH_TIMEOUT: float = 2.0
+    AUTH_MAX_CONNECTIONS: int = 100
+    AUTH_CACHE_TTL: float = 30.0
+    AUTH_CACHE_SIZE: int = 10_000
+    AUTH_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    AUTH_CIRCUIT_RESET_TIMEOUT: float = 30.0
+    # What to do while the auth service is unavailable, see `RemoteAuthClient`
+    AUTH_FAIL_POLICY: Literal["open", "closed"] = "closed"
+    # Access tokens are signed with SECRET_KEY (HS256), or with JWT_PRIVATE_KEY (PEM) under the key
+    # id JWT_KEY_ID (RS256, EdDSA), other services then verify them with the public keys published
+    # at /.well-known/jwks.json. JWT_PREVIOUS_PUBLIC_KEYS (key id -> PEM) keeps tokens signed before
+    # a key rotation valid, and JWT_ACCEPT_HS256 those signed with SECRET_KEY before switching from
+    # HS256, until they expire (ACCESS_TOKEN_EXPIRE_MINUTES).
+    JWT_ALGORITHM: Literal["HS256", "RS256", "EdDSA"] = "HS256"
+    JWT_PRIVATE_KEY: str | None = None
+    JWT_KEY_ID: str = "default"
+    JWT_PREVIOUS_PUBLIC_KEYS: dict[str, str] = {}
+    JWT_ACCEPT_HS256: bool = False
     # 60 minutes * 24 hours * 7 days = 7 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
+    # Processes used for bcrypt, and how many hashes may wait for them before requests get a 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    # Token bucket limits of login and registration attempts per client IP, and of failed ones per
+    # email and client IP, as a sustained rate per minute and a burst size
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_IP_PER_MINUTE: float = 30
+    RATE_LIMIT_IP_BURST: int = 30
+    RATE_LIMIT_EMAIL_PER_MINUTE: float = 5
+    RATE_LIMIT_EMAIL_BURST: int = 10
+    # File in shared memory holding the buckets of all workers (set by `scripts/gunicorn_conf.py`),
+    # without it each process limits on its own
+    RATE_LIMIT_FILE: str | None = None
+    RATE_LIMIT_SLOTS: int = 65536
+    # Seconds between writes of buffered `last_active` timestamps, and the minimum
+    # age in seconds of the stored timestamp before a new one is recorded
+    LAST_ACTIVE_FLUSH_INTERVAL: float = 5.0
+    LAST_ACTIVE_PRECISION: int = 60
+    # Per-worker Bloom filter of registered emails, letting logins with unknown emails skip the
+    # database. Sized for at least `EMAIL_FILTER_CAPACITY` users, rebuilt every refresh interval.
+    EMAIL_FILTER_ENABLED: bool = True
+    EMAIL_FILTER_CAPACITY: int = 100_000
+    EMAIL_FILTER_ERROR_RATE: float = 0.01
+    EMAIL_FILTER_REFRESH_INTERVAL: float = 3600.0
+    # Per-worker cache of authenticated users, a TTL of 0 disables it
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL: float = 60.0
+    # Key of the admin endpoints, sent in the `X-Admin-Key` header. They are disabled without it.
+    ADMIN_API_KEY: str | None = None
+    # Processes hashing plaintext passwords of the admin user import, and rows per batch
+    USER_IMPORT_HASH_WORKERS: int = 2
+    USER_IMPORT_BATCH_SIZE: int = 1000
     DOMAIN: str = "localhost"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
     BASE_DIR: str = str(os.path.dirname(os.path.dirname(__file__)))
     LOG_DIR: str = str(os.path.join(BASE_DIR, "logs"))
+    # Write log files as JSON lines instead of plain text
+    LOG_JSON: bool = False
+    # Report the SQL statement count and time of each request in a `Server-Timing` header,
+    # and warn about requests running more statements than the threshold (0 disables it)
+    QUERY_STATS_HEADER: bool = True
+    QUERY_COUNT_WARNING_THRESHOLD: int = 10
+    # Seconds between updates of the metrics sampled from this worker, see `app/core/metrics.py`
+    METRICS_UPDATE_INTERVAL: float = 5.0
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -56,8 +117,30 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "fastapi_template"
     POSTGRES_SCHEMA: str = "public"
+    # Optional read replicas as "host" or "host:port", read-only queries are routed to the
+    # fastest one whose replication lag is within POSTGRES_REPLICA_MAX_LAG seconds
+    POSTGRES_REPLICAS: Annotated[
+        list[str] | str, BeforeValidator(parse_cors)
+    ] = []
+    POSTGRES_REPLICA_MAX_LAG: float = 5.0
+    POSTGRES_REPLICA_CHECK_INTERVAL: float = 5.0
     POSTGRES_ENCRYPTION_KEY: str = "changethis"
     POSTGRES_ENCRYPTION_KEY_VERSION: int = 1
+    # Key for the HMAC blind indexes that make encrypted columns searchable
+    POSTGRES_BLIND_INDEX_KEY: str = "changethis"
+    # Connection pool of each engine, per worker process. POSTGRES_PGBOUNCER disables
+    # prepared statements, which PgBouncer's transaction pooling doesn't support.
+    POSTGRES_POOL_SIZE: int = 5
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT: float = 30.0
+    POSTGRES_POOL_RECYCLE: int = 1800
+    POSTGRES_POOL_PRE_PING: bool = False
+    POSTGRES_PGBOUNCER: bool = False
+    # Seconds between pool statistics log lines, 0 disables them
+    POSTGRES_POOL_STATS_INTERVAL: float = 60.0
+    # "async" runs queries on the event loop through an AsyncSession,
+    # "sync" keeps the blocking Session and offloads it to the threadpool.
+    DATABASE_MODE: Literal["sync", "async"] = "async"
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -71,6 +154,24 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_REPLICA_URIS(self) -> list[PostgresDsn]:
+        uris = []
+        for replica in self.POSTGRES_REPLICAS:
+            host, _, port = replica.partition(":")
+            uris.append(
+                MultiHostUrl.build(
+                    scheme="postgresql+psycopg",
+                    username=self.POSTGRES_USER,
+                    password=self.POSTGRES_PASSWORD,
+                    host=host,
+                    port=int(port) if port else self.POSTGRES_PORT,
+                    path=self.POSTGRES_DB,
+                )
+            )
+        return uris
+
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value in ["changethis", "admin", "root", "postgres"]:
             message = (
@@ -82,11 +183,23 @@ class Settings(BaseSettings):
             else:
                 raise ValueError(message)
 
+    def _check_signing_key(self) -> None:
+        if self.JWT_ALGORITHM == "HS256" or self.JWT_PRIVATE_KEY:
+            return
+        message = f"JWT_PRIVATE_KEY is required to sign tokens with {self.JWT_ALGORITHM}."
+        if self.ENVIRONMENT == "local" and self.JWT_ALGORITHM == "EdDSA":
+            warnings.warn(f"{message} A key derived from SECRET_KEY is used instead.", stacklevel=1)
+        else:
+            raise ValueError(message)
+
     @model_validator(mode="after")
     def _enforce_non_default_secrets(self) -> Self:
         self._check_default_secret("SECRET_KEY", self.SECRET_KEY)
         self._check_default_secret("POSTGRES_PASSWORD", self.POSTGRES_PASSWORD)
         self._check_default_secret("POSTGRES_ENCRYPTION_KEY", self.POSTGRES_ENCRYPTION_KEY)
+        self._check_default_secret("POSTGRES_BLIND_INDEX_KEY", self.POSTGRES_BLIND_INDEX_KEY)
+        self._check_default_secret("ADMIN_API_KEY", self.ADMIN_API_KEY)
+        self._check_signing_key()
 
         return self
 
@@ -1,20 +1,246 @@
-import importlib
+import asyncio
+import functools
 import json
+import logging
 import os
-from collections.abc import Generator
+import random
+import threading
+import time
+from collections.abc import AsyncGenerator, Generator
+from typing import Any
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Engine, Executable, ScalarResult, create_engine, event, exc, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import SessionTransaction, sessionmaker
 from sqlalchemy.orm.session import Session
 
 from app.core.config import settings
+from app.core.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from app.core.seed import SeedResult, iter_json_array, seed
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+logger = logging.getLogger(__name__)
+
+
+def get_engine_options() -> dict[str, Any]:
+    options: dict[str, Any] = {
+        "pool_size": settings.POSTGRES_POOL_SIZE,
+        "max_overflow": settings.POSTGRES_MAX_OVERFLOW,
+        "pool_timeout": settings.POSTGRES_POOL_TIMEOUT,
+        "pool_recycle": settings.POSTGRES_POOL_RECYCLE,
+        "pool_pre_ping": settings.POSTGRES_POOL_PRE_PING,
+    }
+    if settings.POSTGRES_PGBOUNCER:
+        # Transaction pooling may hand each transaction a different server connection
+        options["connect_args"] = {"prepare_threshold": None}
+    return options
+
+
+class Replica:
+    """ A read replica, with its engines and the latest health check results """
+
+    # Seconds the replica is skipped after a failed query or health check
+    RETRY_AFTER = 30.0
+
+    LAG_QUERY = text(
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    )
+
+    def __init__(self, url: str, *, max_lag: float):
+        self.max_lag = max_lag
+        self.engine = create_engine(url, poolclass=InstrumentedQueuePool, **get_engine_options())
+        self.async_engine = create_async_engine(url, poolclass=InstrumentedAsyncQueuePool, **get_engine_options())
+        self.latency: float | None = None
+        self.lag = 0.0
+        self.down_until = 0.0
+
+    def __repr__(self) -> str:
+        return f"Replica({self.engine.url.host}:{self.engine.url.port})"
+
+    @property
+    def available(self) -> bool:
+        return self.lag <= self.max_lag and time.monotonic() >= self.down_until
+
+    def mark_down(self) -> None:
+        self.down_until = time.monotonic() + self.RETRY_AFTER
+
+    def check(self) -> None:
+        """
+        Measure the round trip latency (as a moving average) and the replication lag.
+        """
+        start = time.perf_counter()
+        try:
+            with self.engine.connect() as connection:
+                self.lag = float(connection.execute(self.LAG_QUERY).scalar_one() or 0)
+        except exc.DBAPIError as e:
+            logger.error(f"{self!r} health check failed: {str(e)}")
+            self.mark_down()
+            return
+        elapsed = time.perf_counter() - start
+        self.latency = elapsed if self.latency is None else 0.2 * elapsed + 0.8 * self.latency
+        self.down_until = 0.0
+
+
+class ReplicaSet:
+    """ The read replicas, and the choice of the one a read-only query goes to """
+
+    def __init__(self, urls: list[str], *, max_lag: float):
+        self.replicas = [Replica(url, max_lag=max_lag) for url in urls]
+
+    def choose(self) -> Replica | None:
+        """
+        Pick the faster of two random available replicas, so load still spreads when
+        latencies are close. Returns None when no replica is available.
+        """
+        available = [replica for replica in self.replicas if replica.available]
+        if len(available) <= 1:
+            return available[0] if available else None
+        return min(random.sample(available, 2), key=lambda replica: replica.latency or 0.0)
+
+    def check_all(self) -> None:
+        for replica in self.replicas:
+            replica.check()
+
+    async def monitor(self, interval: float) -> None:
+        """
+        Check the replicas every `interval` seconds until cancelled.
+        """
+        while True:
+            await asyncio.to_thread(self.check_all)
+            await asyncio.sleep(interval)
+
+
+class _lazy(functools.cached_property):  # type: ignore[type-arg]
+    """
+    `functools.cached_property` holding a lock while the value is created, so threads using it
+    for the first time at once share one engine. Later reads don't call the descriptor at all.
+    """
+
+    _lock = threading.RLock()
+
+    def __get__(self, instance: Any, owner: Any = None) -> Any:
+        if instance is None:
+            return self
+        with self._lock:
+            return super().__get__(instance, owner)
+
+
+class Database:
+    """
+    The engines, read replicas and session factories, created on first use rather than on
+    import: the lifespan creates the ones the routes use, scripts only the ones they need.
+    """
+
+    @_lazy
+    def engine(self) -> Engine:
+        return create_engine(
+            str(settings.SQLALCHEMY_DATABASE_URI), poolclass=InstrumentedQueuePool, **get_engine_options()
+        )
+
+    @_lazy
+    def async_engine(self) -> AsyncEngine:
+        # The `postgresql+psycopg` dialect resolves to psycopg's async driver when used with an async engine
+        return create_async_engine(
+            str(settings.SQLALCHEMY_DATABASE_URI), poolclass=InstrumentedAsyncQueuePool, **get_engine_options()
+        )
+
+    @_lazy
+    def replicas(self) -> ReplicaSet:
+        return ReplicaSet(
+            [str(uri) for uri in settings.SQLALCHEMY_REPLICA_URIS], max_lag=settings.POSTGRES_REPLICA_MAX_LAG
+        )
+
+    @_lazy
+    def session_factory(self) -> sessionmaker[Session]:
+        return sessionmaker(autocommit=False, autoflush=False, bind=self.engine, class_=RoutingSession)
+
+    @_lazy
+    def async_session_factory(self) -> async_sessionmaker[AsyncSession]:
+        return async_sessionmaker(
+            autoflush=False, bind=self.async_engine, expire_on_commit=False, sync_session_class=RoutingSession
+        )
+
+    def created(self, name: str) -> bool:
+        return name in self.__dict__
+
+
+database = Database()
+
+
+class RoutingSession(Session):
+    """
+    Sends statements with the `read_replica` execution option to a replica, everything else
+    to the primary. Once the transaction has written, it reads from the primary too.
+    """
+
+    def get_bind(self, mapper: Any = None, *, clause: Any = None, **kwargs: Any) -> Engine:
+        primary = super().get_bind(mapper, clause=clause, **kwargs)
+        if (
+            isinstance(clause, Executable)
+            and clause.get_execution_options().get("read_replica")
+            and not self.info.get("has_written")
+        ):
+            replica = database.replicas.choose()
+            if replica is not None:
+                self.info["replica"] = replica
+                return replica.async_engine.sync_engine if primary.dialect.is_async else replica.engine
+        return primary
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_written(session: Session, _flush_context: Any) -> None:
+    session.info["has_written"] = True
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_written(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("has_written", None)
+
+
+def read_scalars(session: Session, statement: Executable) -> ScalarResult[Any]:
+    """
+    Run a read-only statement on a replica, retrying it on the primary if the replica fails.
+
+    The retry rolls back the session's transaction, whose connection to the replica is broken:
+    objects loaded before are expired and pending ones are discarded. Only the primary is used
+    once the transaction has written, so flushed changes are never lost.
+    """
+    session.info.pop("replica", None)
+    try:
+        return session.scalars(statement.execution_options(read_replica=True))
+    except exc.OperationalError:
+        replica = session.info.pop("replica", None)
+        if replica is None:
+            raise
+        replica.mark_down()
+        session.rollback()
+        return session.scalars(statement)
+
+
+async def read_scalars_async(session: AsyncSession, statement: Executable) -> ScalarResult[Any]:
+    """
+    Async version of `read_scalars`.
+    """
+    session.info.pop("replica", None)
+    try:
+        return await session.scalars(statement.execution_options(read_replica=True))
+    except exc.OperationalError:
+        replica = session.info.pop("replica", None)
+        if replica is None:
+            raise
+        replica.mark_down()
+        await session.rollback()
+        return await session.scalars(statement)
 
 
 def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
+    db = database.session_factory()
     try:
         yield db
     except:
@@ -26,23 +252,70 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-def init_db(session: Session) -> None:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with database.async_session_factory() as db:
+        try:
+            yield db
+        except:
+            await db.rollback()
+            raise
+        else:
+            await db.commit()
+
+
+async def prewarm_pool() -> None:
+    """
+    Open `POSTGRES_POOL_SIZE` connections of the engine used by the routes, so the first
+    requests of a worker don't pay for connection setup.
+    """
+    if settings.DATABASE_MODE == "async":
+        # Every connection is held until all are open, otherwise the same one gets reused
+        barrier = asyncio.Barrier(settings.POSTGRES_POOL_SIZE)
+
+        async def open_connection() -> None:
+            async with database.async_engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+                await barrier.wait()
+
+        await asyncio.gather(*(open_connection() for _ in range(settings.POSTGRES_POOL_SIZE)))
+    else:
+        def open_connections() -> None:
+            connections = [database.engine.connect() for _ in range(settings.POSTGRES_POOL_SIZE)]
+            for connection in connections:
+                connection.execute(text("SELECT 1"))
+                connection.close()
+
+        await asyncio.to_thread(open_connections)
+
+
+def get_pool_stats() -> dict[str, dict[str, Any]]:
+    # Engines that weren't used yet have no pool to report
+    stats = {}
+    if database.created("engine"):
+        stats["sync"] = database.engine.pool.stats()  # type: ignore[attr-defined]
+    if database.created("async_engine"):
+        stats["async"] = database.async_engine.pool.stats()  # type: ignore[attr-defined]
+    for replica in database.replicas.replicas:
+        stats[f"{replica!r}.sync"] = replica.engine.pool.stats()  # type: ignore[attr-defined]
+        stats[f"{replica!r}.async"] = replica.async_engine.pool.stats()  # type: ignore[attr-defined]
+    return stats
+
+
+async def log_pool_stats_periodically(interval: float) -> None:
+    """
+    Log the pool statistics every `interval` seconds until cancelled.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        logger.info(f"Database pool stats: {json.dumps(get_pool_stats())}")
+
+
+def init_db(session: Session) -> SeedResult | None:
     if settings.ENVIRONMENT != "local":
         return None
 
-    models_module = importlib.import_module("app.models")
+    # One transaction for the whole file
     with open(os.path.join(os.path.dirname(os.path.dirname(__file__)), "initial_data.json")) as f:
-        initial_data = json.load(f)
-
-    for obj in initial_data:
-        model_class = getattr(models_module, obj["model"])
-        db_obj = session.query(model_class).filter(model_class.__mapper__.primary_key[0] == obj["pk"]).first()
-        if db_obj:
-            for key, value in obj["fields"].items():
-                setattr(db_obj, key, value)
-        else:
-            db_obj = model_class(**{model_class.__mapper__.primary_key[0].name: obj["pk"]}, **obj["fields"])
-            session.add(db_obj)
-        session.commit()
-
-    return None
+        result = seed(session.connection(), iter_json_array(f))
+    session.commit()
+    return result
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import math
+
+import psycopg
+from sqlalchemy import func, select
+
+from app.common.constants import USER_REGISTERED_CHANNEL
+from app.core.config import settings
+from app.core.db import database
+from app.models import User
+from app.sqltypes import blind_index
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    A set of digests that can only answer "definitely not added" or "maybe added".
+
+    The bit positions are derived from the digest itself (double hashing), so the
+    digests must already be uniformly distributed, like HMACs.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest: bytes) -> list[int]:
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, digest: bytes) -> None:
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class EmailFilter:
+    """
+    A Bloom filter of the email blind indexes of all users, so logins with emails that were
+    never registered skip the database.
+
+    It is built from the user table once `listen` is running, kept up to date by the
+    `user_registered` notifications and rebuilt periodically, which also drops deleted users.
+    Until it is built, or while the listener is disconnected, every email may exist.
+    """
+
+    def __init__(self, *, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter: BloomFilter | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._filter is not None
+
+    def might_exist(self, email: str) -> bool:
+        bloom_filter = self._filter
+        return bloom_filter is None or blind_index(email) in bloom_filter
+
+    def add(self, digest: bytes) -> None:
+        if self._filter is not None:
+            self._filter.add(digest)
+
+    def rebuild(self, batch_size: int = 10_000) -> int:
+        """
+        Build a new filter by streaming the blind indexes of the user table, and swap it in.
+
+        Returns:
+            int: The number of users added.
+        """
+        with database.engine.connect() as connection:
+            count = connection.scalar(select(func.count()).select_from(User)) or 0
+            # Sized for growth until the next rebuild
+            bloom_filter = BloomFilter(max(self.capacity, 2 * count), self.error_rate)
+            added = 0
+            result = connection.execution_options(yield_per=batch_size).execute(select(User.email_bidx))
+            for digest in result.scalars():
+                bloom_filter.add(digest)
+                added += 1
+        self._filter = bloom_filter
+        return added
+
+    async def listen(self, refresh_interval: float, retry_interval: float = 5.0) -> None:
+        """
+        Build the filter, then add the emails of the `user_registered` notifications and
+        rebuild it every `refresh_interval` seconds, until cancelled.
+        """
+        conninfo = database.engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as connection:
+                    # Listening before building, so emails registered meanwhile are notified afterwards
+                    await connection.execute(f"LISTEN {USER_REGISTERED_CHANNEL}")
+                    while True:
+                        added = await asyncio.to_thread(self.rebuild)
+                        logger.info(f"Email filter built with {added} users")
+                        async for notify in connection.notifies(timeout=refresh_interval):
+                            self.add(bytes.fromhex(notify.payload))
+            except Exception as e:
+                # Also the errors of `rebuild`, raised by the SQLAlchemy engine
+                logger.error(f"Email filter listener disconnected: {str(e)}")
+                # Notifications are missed until reconnected
+                self._filter = None
+                await asyncio.sleep(retry_interval)
+
+
+email_filter = EmailFilter(capacity=settings.EMAIL_FILTER_CAPACITY, error_rate=settings.EMAIL_FILTER_ERROR_RATE)
@@ -0,0 +1,139 @@
+"""
+Prometheus metrics of the service.
+
+Under gunicorn every worker writes its values to mmap files in `PROMETHEUS_MULTIPROC_DIR`
+(set up in `scripts/gunicorn_conf.py`), and a scrape of any worker reads the files of all
+of them, so one scrape covers the whole pod. Without the variable, the metrics of the
+current process are served.
+"""
+import asyncio
+import logging
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily, Metric
+
+from app.core.db import get_pool_stats
+from app.core.remote_auth import remote_auth_client
+from app.core.security import password_hash_executor
+from app.core.user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Duration of HTTP requests",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being handled", multiprocess_mode="livesum"
+)
+
+# Sampled from the workers' own statistics by `update`. Gauges are summed over the live
+# workers, except the maximum wait, so cumulative values restart when a worker does.
+DB_POOL = {
+    stat: Gauge(
+        f"db_pool_{stat}",
+        f"Connection pool statistic `{stat}`",
+        ["pool"],
+        multiprocess_mode="max" if stat == "wait_seconds_max" else "livesum",
+    )
+    for stat in (
+        "size", "checked_out", "overflow", "checkouts", "overflow_checkouts", "timeouts",
+        "wait_seconds_total", "wait_seconds_max",
+    )
+}
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending", "Password hashes running or waiting for a worker", multiprocess_mode="livesum"
+)
+PASSWORD_HASH_QUEUE_SIZE = Gauge(
+    "password_hash_queue_size", "Maximum number of pending password hashes", multiprocess_mode="livesum"
+)
+AUTH_CACHE_HITS = Gauge("auth_cache_hits", "Authentication cache hits", ["cache"], multiprocess_mode="livesum")
+AUTH_CACHE_MISSES = Gauge(
+    "auth_cache_misses", "Authentication cache misses", ["cache"], multiprocess_mode="livesum"
+)
+
+
+def update() -> None:
+    """
+    Copy the statistics of the current worker into the gauges.
+    """
+    for pool, stats in get_pool_stats().items():
+        for stat, gauge in DB_POOL.items():
+            gauge.labels(pool).set(stats[stat])
+    PASSWORD_HASH_PENDING.set(password_hash_executor.pending)
+    PASSWORD_HASH_QUEUE_SIZE.set(password_hash_executor.queue_size)
+    for cache, source in (("user", user_cache), ("remote", remote_auth_client)):
+        AUTH_CACHE_HITS.labels(cache).set(source.hits)
+        AUTH_CACHE_MISSES.labels(cache).set(source.misses)
+
+
+async def update_periodically(interval: float) -> None:
+    """
+    Update the gauges every `interval` seconds until cancelled, so scrapes served by
+    other workers see recent values of this one.
+    """
+    while True:
+        try:
+            update()
+        except Exception as e:
+            logger.error(f"Unable to update metrics: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+class _Snapshot:
+    """ A collector returning metrics that were already collected """
+
+    def __init__(self, metrics: list[Metric]):
+        self.metrics = metrics
+
+    def collect(self) -> list[Metric]:
+        return self.metrics
+
+
+def _hit_ratio(metrics: list[Metric]) -> GaugeMetricFamily:
+    # Computed from the hits and misses summed over the workers, ratios can't be summed
+    totals: dict[tuple[str, str], float] = {}
+    for metric in metrics:
+        if metric.name in ("auth_cache_hits", "auth_cache_misses"):
+            for sample in metric.samples:
+                totals[metric.name, sample.labels["cache"]] = sample.value
+
+    ratio = GaugeMetricFamily("auth_cache_hit_ratio", "Authentication cache hit ratio", labels=["cache"])
+    for cache in ("user", "remote"):
+        hits = totals.get(("auth_cache_hits", cache), 0.0)
+        misses = totals.get(("auth_cache_misses", cache), 0.0)
+        if hits + misses:
+            ratio.add_metric([cache], hits / (hits + misses))
+    return ratio
+
+
+def render() -> bytes:
+    """
+    Returns:
+        bytes: The metrics in the Prometheus text format.
+    """
+    update()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        source = CollectorRegistry()
+        multiprocess.MultiProcessCollector(source)
+    else:
+        source = REGISTRY
+    metrics = list(source.collect())
+    metrics.append(_hit_ratio(metrics))
+
+    registry = CollectorRegistry()
+    registry.register(_Snapshot(metrics))  # type: ignore[arg-type]
+    return generate_latest(registry)
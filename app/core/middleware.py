@@ -0,0 +1,113 @@
+"""
+Pure ASGI middleware.
+
+Unlike `@app.middleware("http")`, which runs the rest of the app in a separate task and
+passes the response body through a memory stream, these only wrap the `send` callable,
+so streaming responses are not buffered.
+"""
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics, query_stats
+from app.core.config import settings
+from app.utils.logger import get_logger
+
+logger = logging.getLogger(__name__)
+access_logger = get_logger("app.access")
+
+
+class SecurityHeadersMiddleware:
+    """
+    Adds `X-Content-Type-Options: nosniff` to every response, and answers a plain
+    500 response when the app raises before it started responding.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                MutableHeaders(scope=message)["X-Content-Type-Options"] = "nosniff"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            logger.error(e)
+            if response_started:
+                # Too late for an error response, let the server close the connection
+                raise
+            response = Response("Internal Server Error", status_code=500)
+            await response(scope, receive, send_wrapper)
+
+
+class RequestStatsMiddleware:
+    """
+    Records the duration, SQL statement count and DB time of each request: in the request
+    metrics, a `Server-Timing` header and an access log line.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stats, token = query_stats.start()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.QUERY_STATS_HEADER:
+                    duration = time.perf_counter() - start
+                    MutableHeaders(scope=message)["Server-Timing"] = (
+                        f"{stats.server_timing()}, total;dur={duration * 1000:.2f}"
+                    )
+            await send(message)
+
+        metrics.REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_stats.reset(token)
+            metrics.REQUESTS_IN_PROGRESS.dec()
+            duration = time.perf_counter() - start
+            # The route template, not the path, so ids in paths don't create new series
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            metrics.REQUEST_DURATION.labels(scope["method"], route_path, status_code).observe(duration)
+            self.log(scope, status_code, duration, stats)
+
+    @staticmethod
+    def log(scope: Scope, status_code: int, duration: float, stats: query_stats.QueryStats) -> None:
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 2),
+            "queries": stats.count,
+            "db_ms": round(stats.duration * 1000, 2),
+        }
+        access_logger.info(" ".join(f"{key}={value}" for key, value in fields.items()), extra={"fields": fields})
+        if 0 < settings.QUERY_COUNT_WARNING_THRESHOLD < stats.count:
+            access_logger.warning(
+                f"{scope['method']} {scope['path']} ran {stats.count} SQL statements, possible N+1 queries"
+            )
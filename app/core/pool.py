@@ -0,0 +1,79 @@
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, QueuePool
+
+
+class PoolMetrics:
+    """ Checkout statistics of a connection pool """
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, wait_seconds: float, *, overflow: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.overflow_checkouts += overflow
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+
+class InstrumentedPoolMixin:
+    """
+    Records how long each checkout waited, and whether it had to open an overflow connection.
+    """
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self) -> PoolProxiedConnection:
+        overflow = self.overflow()  # type: ignore[attr-defined]
+        start = time.perf_counter()
+        try:
+            connection = super().connect()  # type: ignore[misc]
+        except exc.TimeoutError:
+            self.metrics.observe_timeout()
+            raise
+        self.metrics.observe(
+            time.perf_counter() - start,
+            overflow=self.overflow() > max(overflow, 0)  # type: ignore[attr-defined]
+        )
+        return connection
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns:
+            dict: The pool occupancy and the checkout statistics since the pool was created.
+        """
+        return {
+            "size": self.size(),  # type: ignore[attr-defined]
+            "checked_out": self.checkedout(),  # type: ignore[attr-defined]
+            "overflow": max(self.overflow(), 0),  # type: ignore[attr-defined]
+            "checkouts": self.metrics.checkouts,
+            "overflow_checkouts": self.metrics.overflow_checkouts,
+            "timeouts": self.metrics.timeouts,
+            "wait_seconds_total": round(self.metrics.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.metrics.wait_seconds_max, 6),
+        }
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
@@ -0,0 +1,60 @@
+import time
+from contextvars import ContextVar, Token
+from typing import Any
+
+from sqlalchemy import Engine, event
+
+
+class QueryStats:
+    """ The number of SQL statements run for a request, and the time spent running them """
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries"'
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def start() -> tuple[QueryStats, Token[QueryStats | None]]:
+    """
+    Count the statements run in the current context, including the threadpool calls and
+    tasks started from it, until `reset` is called with the returned token.
+    """
+    stats = QueryStats()
+    return stats, _query_stats.set(stats)
+
+
+def reset(token: Token[QueryStats | None]) -> None:
+    _query_stats.reset(token)
+
+
+# Listening on the `Engine` class covers every engine, including the ones behind async engines
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn: Any, _cursor: Any, _statement: Any, _parameters: Any, _context: Any,
+                           _executemany: bool) -> None:
+    if _query_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn: Any, _cursor: Any, _statement: Any, _parameters: Any, _context: Any,
+                          _executemany: bool) -> None:
+    stats = _query_stats.get()
+    if stats is not None and conn.info.get("query_start"):
+        stats.count += 1
+        stats.duration += time.perf_counter() - conn.info["query_start"].pop()
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context: Any) -> None:
+    stats = _query_stats.get()
+    conn = context.connection
+    if stats is not None and conn is not None and conn.info.get("query_start"):
+        stats.count += 1
+        stats.duration += time.perf_counter() - conn.info["query_start"].pop()
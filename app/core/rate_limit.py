@@ -0,0 +1,153 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from app.core.config import settings
+
+
+class SharedTokenBuckets:
+    """
+    Token buckets stored in a memory-mapped file, so every gunicorn worker mapping the same
+    file shares them. Without a file the buckets are private to the process.
+
+    The file is a fixed-size hash table of (key hash, tokens, updated at) slots. A key is
+    looked for in `PROBES` consecutive slots; when it isn't there, it takes the first empty or
+    refilled slot, else the least recently updated one. Evicting an active bucket only
+    forgets its state, so a full table lets requests through rather than blocking them.
+    """
+
+    SLOT = struct.Struct("<Qdd")
+    PROBES = 8
+
+    def __init__(self, path: str | None = None, *, slots: int):
+        self.slots = slots
+        size = slots * self.SLOT.size
+        self._lock = threading.Lock()
+        self._fd: int | None = None
+        if path is None:
+            self._map = mmap.mmap(-1, size)
+        else:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            with self._file_lock():
+                if os.fstat(self._fd).st_size < size:
+                    os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        # flock only excludes other processes, threads of this one are excluded by the lock
+        with self._lock:
+            if self._fd is None:
+                yield
+                return
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # Stable across processes, unlike `hash()`. 0 marks an empty slot.
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+    def acquire(self, key: str, *, rate: float, burst: float, consume: bool = True) -> float:
+        """
+        Take a token from the bucket of `key`.
+
+        Args:
+            key (str): The bucket key, e.g. "login:ip:203.0.113.7".
+            rate (float): Tokens added to the bucket per second.
+            burst (float): The capacity of the bucket.
+            consume (bool): Whether to take the token, else only check that there is one.
+
+        Returns:
+            float: 0 if a token was taken (or is available), else the seconds until one is.
+        """
+        key_hash = self._hash(key)
+        first = key_hash % self.slots
+        with self._file_lock():
+            _now = time.monotonic()
+            offset, tokens, free, oldest, oldest_updated = None, burst, None, 0, float("inf")
+            for probe in range(self.PROBES):
+                slot_offset = (first + probe) % self.slots * self.SLOT.size
+                slot_hash, slot_tokens, slot_updated = self.SLOT.unpack_from(self._map, slot_offset)
+                if slot_hash == key_hash:
+                    offset = slot_offset
+                    tokens = min(burst, slot_tokens + (_now - slot_updated) * rate)
+                    break
+                if free is None and (slot_hash == 0 or slot_tokens + (_now - slot_updated) * rate >= burst):
+                    free = slot_offset
+                if slot_updated < oldest_updated:
+                    oldest, oldest_updated = slot_offset, slot_updated
+            if offset is None:
+                offset = free if free is not None else oldest
+
+            retry_after = 0.0
+            if tokens < 1:
+                retry_after = (1 - tokens) / rate
+            elif consume:
+                tokens -= 1
+            if consume:
+                self.SLOT.pack_into(self._map, offset, key_hash, tokens, _now)
+        return retry_after
+
+    def clear(self) -> None:
+        with self._file_lock():
+            self._map[:] = bytes(len(self._map))
+
+
+class AuthRateLimiter:
+    """
+    Limits the credential checking endpoints per client IP and per email, so a burst of
+    attempts can't take every worker's bcrypt capacity.
+
+    Every attempt counts against the IP, only failed ones against the email (see `record_failure`),
+    and those per IP: failures sent from elsewhere can't lock out a user who knows their password.
+    Guessing one email's password from many IPs is then only limited per IP.
+    """
+
+    def __init__(
+            self, buckets: SharedTokenBuckets, *, ip_per_minute: float, ip_burst: int,
+            email_per_minute: float, email_burst: int,
+    ):
+        self.buckets = buckets
+        self.ip_rate = ip_per_minute / 60
+        self.ip_burst = ip_burst
+        self.email_rate = email_per_minute / 60
+        self.email_burst = email_burst
+
+    def retry_after(self, action: str, *, ip: str | None, email: str) -> float:
+        """
+        Returns:
+            float: 0 if the attempt is allowed, else the seconds until the next one is.
+        """
+        if ip is not None:
+            retry_after = self.buckets.acquire(f"{action}:ip:{ip}", rate=self.ip_rate, burst=self.ip_burst)
+            if retry_after:
+                return retry_after
+        return self.buckets.acquire(
+            self._email_key(action, ip, email), rate=self.email_rate, burst=self.email_burst, consume=False
+        )
+
+    def record_failure(self, action: str, *, ip: str | None, email: str) -> None:
+        self.buckets.acquire(self._email_key(action, ip, email), rate=self.email_rate, burst=self.email_burst)
+
+    @staticmethod
+    def _email_key(action: str, ip: str | None, email: str) -> str:
+        return f"{action}:email:{ip or ''}:{email.strip().lower()}"
+
+
+auth_rate_limiter = AuthRateLimiter(
+    SharedTokenBuckets(settings.RATE_LIMIT_FILE, slots=settings.RATE_LIMIT_SLOTS),
+    ip_per_minute=settings.RATE_LIMIT_IP_PER_MINUTE,
+    ip_burst=settings.RATE_LIMIT_IP_BURST,
+    email_per_minute=settings.RATE_LIMIT_EMAIL_PER_MINUTE,
+    email_burst=settings.RATE_LIMIT_EMAIL_BURST,
+)
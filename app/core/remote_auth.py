@@ -0,0 +1,210 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Literal
+
+import jwt
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class RemoteAuthError(Exception):
+    """Raised when the auth service rejects a token or can't be reached."""
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing service for `reset_timeout` seconds once `failure_threshold`
+    consecutive calls failed, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, *, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> Literal["closed", "open", "half-open"]:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        # A call that ended without an outcome, e.g. cancelled, lets the next one be the trial
+        self._trial_running = False
+
+
+class RemoteAuthClient:
+    """
+    Resolves tokens to users by calling the auth service's `/me` endpoint.
+
+    - Connections are kept alive in a shared `httpx.AsyncClient` pool.
+    - Concurrent lookups of the same token share a single request.
+    - Successful lookups are cached for `cache_ttl` seconds, never past the token's `exp`.
+    - Failures of the auth service open a circuit breaker. While it is open the `fail_policy`
+      applies: "closed" rejects the request with a 503, "open" serves the last successful
+      lookup of the token even if its TTL passed (still never past `exp`), else a 503.
+    """
+
+    def __init__(
+            self, url: str, *, timeout: float, max_connections: int, cache_ttl: float, cache_size: int,
+            failure_threshold: int, reset_timeout: float, fail_policy: Literal["open", "closed"],
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.fail_policy = fail_policy
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+        # token -> (fresh until, valid until, payload), in least recently used order
+        self._cache: OrderedDict[str, tuple[float, float, Any]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[Any]] = {}
+        self._client: httpx.AsyncClient | None = None
+        self.hits = 0
+        self.misses = 0
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            # Imported on first use, services authenticating locally never load it
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections, max_keepalive_connections=self.max_connections
+                ),
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _cache_get(self, token: str, *, stale: bool = False) -> Any | None:
+        entry = self._cache.get(token)
+        if entry is None:
+            return None
+        fresh_until, valid_until, payload = entry
+        _now = time.time()
+        if _now >= valid_until:
+            del self._cache[token]
+            return None
+        if _now >= fresh_until and not stale:
+            return None
+        self._cache.move_to_end(token)
+        return payload
+
+    def _cache_set(self, token: str, payload: Any) -> None:
+        try:
+            # The signature is verified by the auth service, `exp` only bounds the cache lifetime
+            exp = jwt.decode(token, options={"verify_signature": False})["exp"]
+        except (jwt.PyJWTError, KeyError):
+            return
+        self._cache[token] = (min(time.time() + self.cache_ttl, exp), exp, payload)
+        self._cache.move_to_end(token)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _unavailable(self, token: str) -> Any:
+        if self.fail_policy == "open":
+            payload = self._cache_get(token, stale=True)
+            if payload is not None:
+                return payload
+        raise RemoteAuthError(503, "Authentication service unavailable")
+
+    async def _fetch(self, token: str) -> Any:
+        import httpx
+
+        try:
+            response = await self._get_client().get(self.url, headers={"Authorization": f"Bearer {token}"})
+        except httpx.HTTPError:
+            self.breaker.record_failure()
+            return self._unavailable(token)
+        finally:
+            self.breaker.release()
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            return self._unavailable(token)
+        self.breaker.record_success()
+
+        try:
+            response_json = response.json()
+        except ValueError:
+            raise RemoteAuthError(500, "Internal Server Error")
+
+        if response.status_code == 200:
+            self._cache_set(token, response_json)
+            return response_json
+        if isinstance(response_json, dict) and response_json.get("detail"):
+            raise RemoteAuthError(response.status_code, response_json["detail"])
+        raise RemoteAuthError(403, "Invalid credentials")
+
+    async def get_user(self, token: str) -> Any:
+        """
+        Resolve a token to the user payload returned by the auth service.
+
+        Raises:
+            RemoteAuthError: If the token is rejected or the auth service is unavailable.
+        """
+        payload = self._cache_get(token)
+        if payload is not None:
+            self.hits += 1
+            return payload
+        self.misses += 1
+
+        future = self._inflight.get(token)
+        if future is None:
+            if not self.breaker.allow_request():
+                return self._unavailable(token)
+            future = asyncio.ensure_future(self._fetch(token))
+            self._inflight[token] = future
+            future.add_done_callback(lambda _: self._inflight.pop(token, None))
+        # Shielded so a cancelled request doesn't cancel the lookup other requests wait on
+        return await asyncio.shield(future)
+
+
+remote_auth_client = RemoteAuthClient(
+    settings.AUTH_URL,
+    timeout=settings.AUTH_TIMEOUT,
+    max_connections=settings.AUTH_MAX_CONNECTIONS,
+    cache_ttl=settings.AUTH_CACHE_TTL,
+    cache_size=settings.AUTH_CACHE_SIZE,
+    failure_threshold=settings.AUTH_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.AUTH_CIRCUIT_RESET_TIMEOUT,
+    fail_policy=settings.AUTH_FAIL_POLICY,
+)
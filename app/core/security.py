@@ -1,13 +1,51 @@
+import asyncio
 import binascii
 import datetime
+import functools
 import hashlib
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
 
 import bcrypt
 import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
 
 from app.core.config import settings
 
-ALGORITHM = "HS256"
+ALGORITHM = settings.JWT_ALGORITHM
+KEY_ID = settings.JWT_KEY_ID
+ACCEPT_HS256 = settings.JWT_ACCEPT_HS256
+
+
+def _load_pem(pem: str) -> str:
+    # Allow PEM keys passed as a single line env var with escaped newlines
+    return pem.replace("\\n", "\n")
+
+
+def _load_signing_key() -> Any:
+    if ALGORITHM == "HS256":
+        return settings.SECRET_KEY
+    if settings.JWT_PRIVATE_KEY:
+        return serialization.load_pem_private_key(_load_pem(settings.JWT_PRIVATE_KEY).encode(), password=None)
+    # Local development only, enforced by the settings validation
+    return Ed25519PrivateKey.from_private_bytes(hashlib.sha256(settings.SECRET_KEY.encode()).digest())
+
+
+SIGNING_KEY = _load_signing_key()
+# Key id -> key used to verify tokens, the current key first
+VERIFICATION_KEYS: dict[str, Any] = (
+    {KEY_ID: SIGNING_KEY} if ALGORITHM == "HS256" else {
+        KEY_ID: SIGNING_KEY.public_key(),
+        **{
+            kid: serialization.load_pem_public_key(_load_pem(pem).encode())
+            for kid, pem in settings.JWT_PREVIOUS_PUBLIC_KEYS.items()
+        },
+    }
+)
 
 
 def create_access_token(subject: str, /, *, expires_delta: datetime.timedelta) -> str:
@@ -15,7 +53,8 @@ def create_access_token(subject: str, /, *, expires_delta: datetime.timedelta) -
     Create an access token using JWT (JSON Web Token).
 
     This function generates a JWT that encodes a subject and an expiration time.
-    The token is signed with a secret key using a specified algorithm.
+    The token is signed with the configured key and algorithm, and carries the key id
+    in its header so it can be verified against the published JWKS.
 
     Args:
         subject (str): The subject (typically a user identifier) that the token represents.
@@ -29,10 +68,58 @@ def create_access_token(subject: str, /, *, expires_delta: datetime.timedelta) -
     """
     expire = datetime.datetime.now(datetime.UTC) + expires_delta
     to_encode = {"exp": expire, "sub": subject}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, SIGNING_KEY, algorithm=ALGORITHM, headers={"kid": KEY_ID})
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> dict[str, Any]:
+    """
+    Verify an access token and return its payload.
+
+    The verification key is picked from the key id in the token header, so tokens signed
+    with a previous key stay valid while it is listed in `JWT_PREVIOUS_PUBLIC_KEYS`, and
+    those signed with `SECRET_KEY` before switching from HS256 with `JWT_ACCEPT_HS256`.
+
+    Args:
+        token (str): The encoded JWT.
+
+    Returns:
+        dict: The token payload.
+
+    Raises:
+        jwt.PyJWTError: If the token is invalid, expired or signed with an unknown key.
+    """
+    if ALGORITHM == "HS256":
+        return jwt.decode(token, SIGNING_KEY, algorithms=["HS256"])
+    header = jwt.get_unverified_header(token)
+    if ACCEPT_HS256 and header.get("alg") == "HS256":
+        # Only ever verified with the secret, never with a public key
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    key = VERIFICATION_KEYS.get(header.get("kid"))
+    if key is None:
+        raise jwt.InvalidKeyError("Unknown signing key")
+    return jwt.decode(token, key, algorithms=[ALGORITHM])
+
+
+@functools.cache
+def get_jwks() -> dict[str, list[dict[str, Any]]]:
+    """
+    Build the JSON Web Key Set with the public keys used to verify access tokens.
+
+    Returns:
+        dict: The JWKS, with no keys when tokens are signed with a shared secret.
+    """
+    if ALGORITHM == "HS256":
+        return {"keys": []}
+    to_jwk = RSAAlgorithm.to_jwk if ALGORITHM == "RS256" else OKPAlgorithm.to_jwk
+    return {
+        "keys": [
+            {**to_jwk(key, as_dict=True), "kid": kid, "alg": ALGORITHM, "use": "sig"}
+            for kid, key in VERIFICATION_KEYS.items()
+        ]
+    }
+
+
 def get_password_hash(password: str) -> str:
     """
     Generate a hashed password using bcrypt.
@@ -70,3 +157,75 @@ def verify_password(password: str, hashed_password: str) -> bool:
     sha256_hash = hashlib.sha256(password.encode()).digest()
     hex_password = binascii.hexlify(sha256_hash)
     return bcrypt.checkpw(hex_password, hashed_password.encode("ascii"))
+
+
+# A hash of a random password with the same cost as real hashes. Verifying against it when the
+# user doesn't exist makes unknown emails take as long as wrong passwords.
+DUMMY_PASSWORD_HASH = "$2b$12$Z6nHIyrA9P/cKztPU/aua.axCHYx78znXAT4EvxnpXwmGYNe9Cpm6"
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+class PasswordHashExecutor:
+    """
+    Runs bcrypt in a dedicated process pool so it never holds the event loop.
+
+    At most `queue_size` hashes may be running or waiting at once, beyond that
+    `PasswordHasherBusyError` is raised immediately instead of queueing the request.
+    """
+
+    def __init__(self, *, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.pending = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created lazily so every gunicorn worker gets its own pool, spawned rather than
+        # forked because the parent already runs threads
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], /, *args: Any) -> Any:
+        if self.pending >= self.queue_size:
+            raise PasswordHasherBusyError("Password hashing queue is full")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+password_hash_executor = PasswordHashExecutor(
+    workers=settings.PASSWORD_HASH_WORKERS, queue_size=settings.PASSWORD_HASH_QUEUE_SIZE
+)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Async version of `get_password_hash`, hashed in the password hashing process pool.
+
+    Raises:
+        PasswordHasherBusyError: If the hashing queue is full.
+    """
+    return await password_hash_executor.run(get_password_hash, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """
+    Async version of `verify_password`, verified in the password hashing process pool.
+
+    Raises:
+        PasswordHasherBusyError: If the hashing queue is full.
+    """
+    return await password_hash_executor.run(verify_password, password, hashed_password)
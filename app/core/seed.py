@@ -0,0 +1,128 @@
+import dataclasses
+import importlib
+import json
+import logging
+import time
+from collections.abc import Iterable, Iterator
+from typing import IO, Any
+
+from sqlalchemy import ColumnElement, Connection, or_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.sqltypes import EncryptedJSON, EncryptedText, decrypt, tracked_blind_indexes
+
+logger = logging.getLogger(__name__)
+
+
+def iter_json_array(file: IO[str], chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """
+    Parse a JSON array of objects one element at a time, reading the file in chunks, so
+    memory use depends on the size of the largest element rather than of the file.
+
+    Raises:
+        ValueError: If the file isn't a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+
+    def skip(chars: str) -> str:
+        # Skip whitespace and `chars`, reading more as needed, and return the next character
+        nonlocal buffer, position, eof
+        while True:
+            while position < len(buffer) and (buffer[position].isspace() or buffer[position] in chars):
+                position += 1
+            if position < len(buffer) or eof:
+                return buffer[position:position + 1]
+            buffer, position = file.read(chunk_size), 0
+            eof = not buffer
+
+    if skip("") != "[":
+        raise ValueError("Expected a JSON array")
+    position += 1
+    while (char := skip(",")) != "]":
+        if not char:
+            raise ValueError("Unterminated JSON array")
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The element continues in the next chunk
+            chunk = file.read(chunk_size)
+            buffer, position, eof = buffer[position:] + chunk, 0, not chunk
+            continue
+        position = end
+        yield element
+
+
+@dataclasses.dataclass
+class SeedResult:
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def _changed(table: Any, excluded: Any, columns: Iterable[str]) -> ColumnElement[bool]:
+    # Unchanged rows aren't rewritten. Encryption is randomized, so encrypted columns are
+    # compared decrypted.
+    conditions = []
+    for name in columns:
+        column, new = table.c[name], excluded[name]
+        if isinstance(column.type, (EncryptedText, EncryptedJSON)):
+            column, new = decrypt(column), decrypt(new)
+        conditions.append(column.is_distinct_from(new))
+    return or_(*conditions)
+
+
+def _upsert(connection: Connection, model: type[Any], columns: tuple[str, ...], rows: list[dict[str, Any]]) -> None:
+    table = model.__table__
+    pk = model.__mapper__.primary_key[0].name
+    query = insert(table)
+    update_columns = [name for name in columns if name != pk]
+    if update_columns:
+        query = query.on_conflict_do_update(
+            index_elements=[pk],
+            set_={name: query.excluded[name] for name in update_columns},
+            where=_changed(table, query.excluded, update_columns),
+        )
+    else:
+        query = query.on_conflict_do_nothing(index_elements=[pk])
+    connection.execute(query, rows)
+
+
+def seed(connection: Connection, fixtures: Iterable[dict[str, Any]], *, batch_size: int = 1000) -> SeedResult:
+    """
+    Insert or update the rows of fixtures like `{"model": "User", "pk": ..., "fields": {...}}`.
+
+    Fixtures are grouped by model and fields, and each group is written `batch_size` rows at a
+    time with `INSERT ... ON CONFLICT (pk) DO UPDATE`, on the caller's transaction.
+
+    Returns:
+        SeedResult: The number of fixtures and the duration.
+    """
+    start = time.perf_counter()
+    result = SeedResult()
+    models_module = importlib.import_module("app.models")
+    batches: dict[tuple[type[Any], tuple[str, ...]], list[dict[str, Any]]] = {}
+    for fixture in fixtures:
+        model = getattr(models_module, fixture["model"])
+        row = {model.__mapper__.primary_key[0].name: fixture["pk"], **fixture["fields"]}
+        # Hashed by `BlindIndex`, as the ORM events setting them don't run for Core inserts
+        for source, target in tracked_blind_indexes.get(model, {}).items():
+            if source in row:
+                row[target] = row[source]
+        key = model, tuple(row)
+        batch = batches.setdefault(key, [])
+        batch.append(row)
+        if len(batch) >= batch_size:
+            _upsert(connection, *key, batches.pop(key))
+        result.rows += 1
+    for key, batch in batches.items():
+        _upsert(connection, *key, batch)
+
+    result.seconds = time.perf_counter() - start
+    logger.info(f"Seeded {result.rows} rows in {result.seconds:.2f}s ({result.rows_per_second:.0f} rows/s)")
+    return result
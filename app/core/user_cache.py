@@ -0,0 +1,125 @@
+import asyncio
+import dataclasses
+import datetime
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Self
+
+import psycopg
+
+from app.common.constants import USER_CHANGED_CHANNEL
+from app.core.config import settings
+from app.core.db import database
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """ The fields of an authenticated user needed by the routes """
+
+    id: uuid.UUID
+    email: str
+    is_active: bool
+    date_joined: datetime.datetime
+    last_login: datetime.datetime
+    last_active: datetime.datetime
+
+    @classmethod
+    def from_user(cls, user: Any) -> Self:
+        return cls(**{field.name: getattr(user, field.name) for field in dataclasses.fields(cls)})
+
+
+class UserCache:
+    """
+    Per-worker TTL + LRU cache of user snapshots keyed by the token subject.
+
+    Entries are dropped when their TTL expires, when the cache is full (least recently
+    used first), or when Postgres notifies that the user changed. Changes can't be
+    notified while `listen` isn't connected, so the cache is bypassed meanwhile.
+
+    A snapshot read before an invalidation may be stale, so `set` takes the `generation`
+    read before the user and drops the snapshot when entries were invalidated since.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.listening = False
+        self.generation = 0
+        self._entries: OrderedDict[str, tuple[float, UserSnapshot]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> UserSnapshot | None:
+        if not self.listening:
+            self.misses += 1
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, user: UserSnapshot, *, generation: int) -> UserSnapshot:
+        if self.ttl <= 0 or not self.listening:
+            return user
+        with self._lock:
+            if generation != self.generation:
+                return user
+            self._entries[key] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return user
+
+    def update(self, key: str, user: UserSnapshot) -> None:
+        # Replace a cached snapshot without extending its expiry
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], user)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self.generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    async def listen(self, *, retry_interval: float = 5.0) -> None:
+        """
+        Invalidate entries from the user change notifications until cancelled.
+
+        Notifications sent while the connection is down are lost, so the whole cache
+        is cleared every time the listener (re)connects.
+        """
+        conninfo = database.engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as connection:
+                    await connection.execute(f"LISTEN {USER_CHANGED_CHANNEL}")
+                    self.clear()
+                    self.listening = True
+                    async for notify in connection.notifies():
+                        self.invalidate(notify.payload)
+            except Exception as e:
+                self.listening = False
+                logger.error(f"User cache listener disconnected: {str(e)}")
+                self.clear()
+                await asyncio.sleep(retry_interval)
+            finally:
+                self.listening = False
+
+
+user_cache = UserCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
@@ -0,0 +1,56 @@
+"""
+Export every user, with the email decrypted, as CSV or one JSON object per line.
+
+Usage:
+    python -m app.export_users users.ndjson [--format csv] [--batch-size 1000] [--checkpoint users.checkpoint]
+
+With `--checkpoint`, the id of the last exported user is saved after each chunk, and a rerun
+appends to the output after it instead of starting over. "-" writes to stdout.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import uuid
+
+from app.api.crud.user_export import export_users
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export users")
+    parser.add_argument("file", help='CSV or NDJSON file, "-" for stdout')
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--checkpoint", help="File keeping the last exported id, to resume an interrupted export")
+    args = parser.parse_args()
+
+    export_format = args.format or ("csv" if args.file.endswith(".csv") else "ndjson")
+    after = None
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        with open(args.checkpoint) as f:
+            after = uuid.UUID(f.read().strip())
+        logger.info(f"Resuming after {after}")
+
+    start = time.perf_counter()
+    exported = 0
+    output = sys.stdout if args.file == "-" else open(args.file, "a" if after else "w", newline="")
+    with output:
+        for chunk, last_id in export_users(export_format, after=after, batch_size=args.batch_size):
+            output.write(chunk)
+            output.flush()
+            exported += chunk.count("\n")
+            if args.checkpoint and last_id:
+                # Written once the chunk is, so a resumed export never skips rows
+                with open(f"{args.checkpoint}.tmp", "w") as f:
+                    f.write(str(last_id))
+                os.replace(f"{args.checkpoint}.tmp", args.checkpoint)
+    seconds = time.perf_counter() - start
+    logger.info(f"Exported {exported} lines in {seconds:.1f}s ({exported / seconds:.0f} lines/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Import users from a CSV file with a header row, or a file with one JSON object per line.
+
+Usage:
+    python -m app.import_users users.csv [--format ndjson] [--batch-size 1000] [--hash-workers 8]
+
+The fields are those of registration (email, password and gender), a `password_hash` made by
+`get_password_hash` may be given instead of the password. "-" reads from stdin.
+"""
+import argparse
+import logging
+import os
+import sys
+
+from app.api.crud.user_import import import_users
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import users")
+    parser.add_argument("file", help='CSV or NDJSON file, "-" for stdin')
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--hash-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    import_format = args.format or ("ndjson" if args.file.endswith((".ndjson", ".jsonl")) else "csv")
+    stream = sys.stdin.buffer if args.file == "-" else open(args.file, "rb")
+    with stream:
+        result = import_users(
+            stream, import_format=import_format, batch_size=args.batch_size, hash_workers=args.hash_workers
+        )
+    for error in result.errors:
+        logger.warning(error)
+    if result.invalid > len(result.errors):
+        logger.warning(f"{result.invalid - len(result.errors)} more invalid rows")
+
+
+if __name__ == "__main__":
+    main()
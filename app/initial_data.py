@@ -1,21 +1,27 @@
 import logging
 
-from app.core.db import SessionLocal, init_db
+from app.core.config import settings
+from app.core.db import database, init_db
+from app.core.seed import SeedResult
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def init() -> None:
-    session = SessionLocal()
-    init_db(session)
+def init() -> SeedResult | None:
+    session = database.session_factory()
+    result = init_db(session)
     session.close()
+    return result
 
 
 def main() -> None:
     logger.info("Creating initial data")
-    init()
-    logger.info("Initial data created")
+    result = init()
+    if result is None:
+        logger.info(f"Initial data skipped in {settings.ENVIRONMENT} environment")
+    else:
+        logger.info(f"Initial data created: {result.rows} rows ({result.rows_per_second:.0f} rows/s)")
 
 
 if __name__ == "__main__":
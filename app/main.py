@@ -1,64 +1,86 @@
+import asyncio
+import contextlib
 import logging
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from starlette import status
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import JSONResponse
 
-from app.api.main import api_router
+from app.api.errors import validation_error_messages
+from app.api.main import api_router, metrics_router, well_known_router
+from app.api.responses import FastJSONResponse
+from app.core import metrics
+from app.core.activity import last_active_buffer
 from app.core.config import settings
+from app.core.db import database, log_pool_stats_periodically, prewarm_pool
+from app.core.email_filter import email_filter
+from app.core.middleware import RequestStatsMiddleware, SecurityHeadersMiddleware
+from app.core.remote_auth import remote_auth_client
+from app.core.security import password_hash_executor
+from app.core.user_cache import user_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    # Startup work happens here rather than on import, so importing the app stays cheap.
+    # The engines are created by the pool pre-warming.
+    validation_error_messages.build(app.routes)
+    try:
+        await prewarm_pool()
+    except Exception as e:
+        logger.error(f"Unable to pre-warm the database pool: {str(e)}")
+
+    tasks = [
+        asyncio.create_task(last_active_buffer.flush_periodically(settings.LAST_ACTIVE_FLUSH_INTERVAL)),
+        asyncio.create_task(user_cache.listen()),
+    ]
+    if settings.EMAIL_FILTER_ENABLED:
+        tasks.append(asyncio.create_task(email_filter.listen(settings.EMAIL_FILTER_REFRESH_INTERVAL)))
+    if settings.POSTGRES_REPLICAS:
+        tasks.append(asyncio.create_task(database.replicas.monitor(settings.POSTGRES_REPLICA_CHECK_INTERVAL)))
+    if settings.METRICS_UPDATE_INTERVAL > 0:
+        tasks.append(asyncio.create_task(metrics.update_periodically(settings.METRICS_UPDATE_INTERVAL)))
+    if settings.POSTGRES_POOL_STATS_INTERVAL > 0:
+        tasks.append(asyncio.create_task(log_pool_stats_periodically(settings.POSTGRES_POOL_STATS_INTERVAL)))
+    yield
+    for task in tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    await asyncio.to_thread(last_active_buffer.flush)
+    await remote_auth_client.close()
+    password_hash_executor.shutdown()
+
+
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.SERVICE_NAME}/docs/openapi.json",
     docs_url=f"{settings.SERVICE_NAME}/docs",
 )
 
 
-def get_custom_error_message(err):
-    if err["loc"][0] in ["query", "path"]:
-        if err["type"] == "missing":
-            return f"{err['loc'][1].replace('_', ' ').capitalize()} is required"
-        elif err["type"] == "string_pattern_mismatch":
-            return f"Please enter a valid {err['loc'][1].replace('_', ' ')}"
-        elif err["type"] == "greater_than":
-            return f"{err['loc'][1].replace('_', ' ').capitalize()} should be greater than {err.get('input')}"
-        elif err["type"] == "less_than":
-            return f"{err['loc'][1].replace('_', ' ').capitalize()} should be less than {err.get('input')}"
-        elif err["type"] == "uuid_parsing":
-            return f"Invalid {err['loc'][1].replace('_', ' ')}!"
-        else:
-            return err["msg"]
-    else:
-        return err["msg"]
-
-
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request, exc):
-    return JSONResponse(
+    return FastJSONResponse(
         content={
             "detail": {
-                err["loc"][1]: get_custom_error_message(err) for err in exc.errors()
+                err["loc"][1]: validation_error_messages.get(err) for err in exc.errors()
             }
         },
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
     )
 
 
-@app.middleware("http")
-async def db_session_middleware(request: Request, call_next):
-    response = Response("Internal Server Error", status_code=500)
-    try:
-        response = await call_next(request)
-    except Exception as e:
-        logger.error(e)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    return response
-
+app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(RequestStatsMiddleware)
 
 # Set all CORS enabled origins
 if settings.BACKEND_CORS_ORIGINS:
@@ -73,3 +95,5 @@ if settings.BACKEND_CORS_ORIGINS:
     )
 
 app.include_router(api_router, prefix=settings.SERVICE_NAME + settings.API_V1_STR)
+app.include_router(well_known_router, prefix=settings.SERVICE_NAME)
+app.include_router(metrics_router, prefix=settings.SERVICE_NAME)
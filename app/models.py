@@ -2,19 +2,23 @@ import uuid
 from datetime import datetime
 
 from sqlalchemy import (
+    DDL,
     Boolean,
     DateTime,
     Enum,
+    Index,
     Integer,
     Text,
+    event,
     func,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from app.common.constants import USER_CHANGED_CHANNEL, USER_REGISTERED_CHANNEL
 from app.common.enums import GenderEnum
 from app.core.config import settings
-from app.sqltypes import EncryptedText
+from app.sqltypes import BlindIndex, EncryptedText, track_blind_index
 
 
 class Base(DeclarativeBase):
@@ -25,8 +29,17 @@ class Base(DeclarativeBase):
 
 class User(Base):
     __tablename__ = "user"
+    __table_args__ = (
+        # Keyset pagination of the admin user listing, unfiltered and by each filter
+        Index("ix_user_date_joined_id", "date_joined", "id"),
+        Index("ix_user_is_active_date_joined_id", "is_active", "date_joined", "id"),
+        Index("ix_user_gender_date_joined_id", "gender", "date_joined", "id"),
+        Base.__table_args__,
+    )
 
-    email: Mapped[bytes] = mapped_column(EncryptedText(), nullable=False, unique=True)
+    email: Mapped[str] = mapped_column(EncryptedText(), nullable=False, unique=True)
+    # Encrypted values can't be indexed, lookups by email go through its HMAC instead
+    email_bidx: Mapped[bytes] = mapped_column(BlindIndex(), nullable=False, unique=True)
     password: Mapped[str] = mapped_column(Text(), nullable=False)
     gender: Mapped[str] = mapped_column(Enum(GenderEnum, name="gender_enum"), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean(), nullable=False, default=True)
@@ -54,3 +67,63 @@ class User(Base):
 
     def __repr__(self) -> str:
         return f"User(email={self.email})"
+
+
+track_blind_index(User.email, User.email_bidx)
+
+# Notify every worker's user cache when a user changes. `last_active` is left out as
+# it is written in batches and cached snapshots keep track of it themselves.
+event.listen(
+    User.__table__,
+    "after_create",
+    DDL(
+        f"""
+        CREATE OR REPLACE FUNCTION {settings.POSTGRES_SCHEMA}.notify_user_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{USER_CHANGED_CHANNEL}', COALESCE(NEW.id, OLD.id)::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+)
+event.listen(
+    User.__table__,
+    "after_create",
+    DDL(
+        f"""
+        CREATE TRIGGER user_changed
+        AFTER UPDATE OF email, password, gender, is_active, last_login, key_version OR DELETE
+        ON {settings.POSTGRES_SCHEMA}."user"
+        FOR EACH ROW EXECUTE FUNCTION {settings.POSTGRES_SCHEMA}.notify_user_changed()
+        """
+    )
+)
+
+# Notify every worker's email filter of new emails
+event.listen(
+    User.__table__,
+    "after_create",
+    DDL(
+        f"""
+        CREATE OR REPLACE FUNCTION {settings.POSTGRES_SCHEMA}.notify_user_registered() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{USER_REGISTERED_CHANNEL}', encode(NEW.email_bidx, 'hex'));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+)
+event.listen(
+    User.__table__,
+    "after_create",
+    DDL(
+        f"""
+        CREATE TRIGGER user_registered
+        AFTER INSERT OR UPDATE OF email_bidx
+        ON {settings.POSTGRES_SCHEMA}."user"
+        FOR EACH ROW EXECUTE FUNCTION {settings.POSTGRES_SCHEMA}.notify_user_registered()
+        """
+    )
+)
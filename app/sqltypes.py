@@ -1,10 +1,15 @@
+import hashlib
+import hmac
 import json
+from typing import Any
 
 from sqlalchemy import (
     LargeBinary,
     TypeDecorator,
+    event,
     func,
 )
+from sqlalchemy.orm import InstrumentedAttribute
 
 from app.core.config import settings
 
@@ -17,6 +22,42 @@ def decrypt(value):
     return func.pgp_sym_decrypt(value, settings.POSTGRES_ENCRYPTION_KEY)
 
 
+def blind_index(value: str, *, case_sensitive: bool = False) -> bytes:
+    """
+    Compute the deterministic HMAC-SHA256 digest used to look up an encrypted value.
+
+    Args:
+        value (str): The plaintext value.
+        case_sensitive (bool): Whether to keep the case of the value, otherwise it is lowercased.
+
+    Returns:
+        bytes: The 32-byte digest.
+    """
+    if not case_sensitive:
+        value = value.lower()
+    return hmac.digest(settings.POSTGRES_BLIND_INDEX_KEY.encode(), value.encode(), hashlib.sha256)
+
+
+# Model -> {encrypted column: blind index column}, for Core statements which don't run the ORM events
+tracked_blind_indexes: dict[type[Any], dict[str, str]] = {}
+
+
+def track_blind_index(source: InstrumentedAttribute[Any], target: InstrumentedAttribute[Any]) -> None:
+    """
+    Keep a `BlindIndex` column up to date whenever its encrypted source column is set on a model.
+
+    Args:
+        source (InstrumentedAttribute): The encrypted attribute, e.g. `User.email`.
+        target (InstrumentedAttribute): The blind index attribute, e.g. `User.email_bidx`.
+    """
+    tracked_blind_indexes.setdefault(source.class_, {})[source.key] = target.key
+    case_sensitive = target.type.case_sensitive
+
+    @event.listens_for(source, "set")
+    def set_blind_index(obj, value, _oldvalue, _initiator):
+        setattr(obj, target.key, None if value is None else blind_index(value, case_sensitive=case_sensitive))
+
+
 class EncryptedText(TypeDecorator):
     """ Custom type for encrypted text column """
 
@@ -79,3 +120,20 @@ class EncryptedJSON(TypeDecorator):
     def column_expression(self, col):
         # This will decrypt the data when reading from the database
         return func.pgp_sym_decrypt(col, settings.POSTGRES_ENCRYPTION_KEY, type_=self)
+
+
+class BlindIndex(TypeDecorator):
+    """ Custom type for the HMAC blind index of an encrypted column """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, *args, case_sensitive: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.case_sensitive = case_sensitive
+
+    def process_bind_param(self, value, dialect):
+        # Plaintext values (e.g. in a WHERE clause) are hashed, digests are sent as they are
+        if isinstance(value, str):
+            return blind_index(value, case_sensitive=self.case_sensitive)
+        return value
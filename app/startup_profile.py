@@ -0,0 +1,125 @@
+"""
+Report the cold start cost of a worker: the import time of each module, and the time from
+process start to the first response.
+
+Usage:
+    python -m app.startup_profile [--top 20] [--path /.well-known/jwks.json]
+
+The app is started in a fresh interpreter with `-X importtime`, runs its lifespan startup and
+serves one GET request, like a gunicorn worker receiving its first request.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any
+
+
+async def _get(app: Any, path: str) -> int:
+    # A bare ASGI call, so no HTTP client is imported
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    status = 0
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _serve_first_request(app: Any, path: str) -> dict[str, Any]:
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        status = await _get(app, path)
+        responded = time.perf_counter()
+        responded_at = time.time()
+    return {
+        "startup": started - start,
+        "first_request": responded - started,
+        "status": status,
+        "responded_at": responded_at,
+    }
+
+
+def _child(path: str) -> None:
+    start = time.perf_counter()
+    from app.main import app
+
+    timings = {"import": time.perf_counter() - start}
+    timings.update(asyncio.run(_serve_first_request(app, path)))
+    print(json.dumps(timings))
+
+
+def _parse_import_times(output: str) -> list[tuple[str, int, int]]:
+    # Lines of `-X importtime`: "import time: <self us> | <cumulative us> | <indented module>"
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Profile the app's cold start")
+    parser.add_argument("--top", type=int, default=20, help="Modules listed by cumulative import time")
+    parser.add_argument("--path", default="/.well-known/jwks.json", help="Path of the first request")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.path)
+        return
+
+    spawned_at = time.time()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "app.startup_profile", "--child", "--path", args.path],
+        capture_output=True, text=True,
+    )
+    if process.returncode != 0:
+        sys.exit(process.stderr)
+    timings = json.loads(process.stdout.strip().splitlines()[-1])
+    modules = _parse_import_times(process.stderr)
+
+    print(f"{'phase':<32} {'ms':>10}")
+    print(f"{'import app.main':<32} {timings['import'] * 1000:>10.1f}")
+    print(f"{'lifespan startup':<32} {timings['startup'] * 1000:>10.1f}")
+    print(f"{'first request (' + str(timings['status']) + ')':<32} {timings['first_request'] * 1000:>10.1f}")
+    print(f"{'process start to first response':<32} {(timings['responded_at'] - spawned_at) * 1000:>10.1f}")
+
+    packages: dict[str, int] = defaultdict(int)
+    for name, self_us, _cumulative_us in modules:
+        packages[name.split(".")[0]] += self_us
+    print(f"\n{'package (self time)':<48} {'ms':>10}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<48} {self_us / 1000:>10.1f}")
+
+    print(f"\n{'module (cumulative time)':<48} {'ms':>10}")
+    for name, _self_us, cumulative_us in sorted(modules, key=lambda module: -module[2])[:args.top]:
+        print(f"{name:<48} {cumulative_us / 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api.crud.auth import get_user_by_email
+from app.core.config import settings
+from app.core.security import DUMMY_PASSWORD_HASH, verify_password
+
+ADMIN_KEY = "test-admin-key"
+
+
+@pytest.fixture
+def admin_headers(monkeypatch: pytest.MonkeyPatch) -> dict[str, str]:
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", ADMIN_KEY)
+    return {"X-Admin-Key": ADMIN_KEY}
+
+
+def test_admin_key_required(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    response = client.post("/api/v1/admin/users/import", content=b"")
+    assert response.status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", ADMIN_KEY)
+    response = client.post("/api/v1/admin/users/import", content=b"", headers={"X-Admin-Key": "invalid"})
+    assert response.status_code == 403
+
+
+def test_import_users_csv(client: TestClient, db_session: Session, admin_headers: dict[str, str]) -> None:
+    body = (
+        "email,password,password_hash,gender\n"
+        "import1@gmail.com,secret12,,Male\n"
+        f"Import2@gmail.com,,{DUMMY_PASSWORD_HASH},Female\n"
+        "import3@gmail.com,,,Male\n"
+        "import4@gmail.com,secret12,,Robot\n"
+        "johndoe@gmail.com,secret12,,Male\n"
+        "import1@gmail.com,other,,Male\n"
+    )
+    response = client.post("/api/v1/admin/users/import?format=csv", content=body, headers=admin_headers)
+
+    assert response.status_code == 200
+    content = response.json()["data"]
+    assert content["rows"] == 6
+    assert content["imported"] == 2
+    assert content["duplicates"] == 2
+    assert content["invalid"] == 2
+    assert content["errors"][0].startswith("Line 4:")
+
+    user = get_user_by_email(db_session, email="import1@gmail.com")
+    assert user
+    assert user.email == "import1@gmail.com"
+    assert user.gender == "Male"
+    assert verify_password("secret12", user.password)
+    user = get_user_by_email(db_session, email="import2@gmail.com")
+    assert user
+    assert user.password == DUMMY_PASSWORD_HASH
+
+
+def test_import_users_ndjson(client: TestClient, admin_headers: dict[str, str]) -> None:
+    body = "\n".join([
+        json.dumps({"email": "import5@gmail.com", "password_hash": DUMMY_PASSWORD_HASH, "gender": "Others"}),
+        "not json",
+        "",
+    ])
+    response = client.post("/api/v1/admin/users/import?format=ndjson", content=body, headers=admin_headers)
+
+    assert response.status_code == 200
+    content = response.json()["data"]
+    assert content["rows"] == 2
+    assert content["imported"] == 1
+    assert content["errors"] == ["Line 2: Invalid row"]
+
+
+def test_export_users(client: TestClient, admin_headers: dict[str, str]) -> None:
+    response = client.get("/api/v1/admin/users/export?format=ndjson", headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    users = [json.loads(line) for line in response.text.splitlines()]
+    assert users == sorted(users, key=lambda user: user["id"])
+    assert {"email": "johndoe@gmail.com", "gender": "Male"}.items() <= next(
+        user for user in users if user["email"] == "johndoe@gmail.com"
+    ).items()
+
+    response = client.get(f"/api/v1/admin/users/export?format=csv&after={users[0]['id']}", headers=admin_headers)
+
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert [row[0] for row in rows] == [user["id"] for user in users[1:]]
+
+
+def test_list_users(client: TestClient, admin_headers: dict[str, str]) -> None:
+    exported = client.get("/api/v1/admin/users/export", headers=admin_headers).text.splitlines()
+
+    users, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/v1/admin/users", params=params, headers=admin_headers)
+        assert response.status_code == 200
+        content = response.json()["data"]
+        assert len(content["users"]) <= 2
+        assert content["estimated_total"] >= 0
+        users += content["users"]
+        cursor = content["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(users) == len(exported)
+    assert len({user["user_id"] for user in users}) == len(users)
+    keys = [(user["date_joined"], user["user_id"]) for user in users]
+    assert keys == sorted(keys, reverse=True)
+
+    response = client.get("/api/v1/admin/users", params={"gender": "Female"}, headers=admin_headers)
+    assert response.status_code == 200
+    content = response.json()["data"]
+    assert content["users"]
+    assert all(user["gender"] == "Female" for user in content["users"])
+    assert content["estimated_total"] >= 0
+
+
+def test_list_users_invalid_cursor(client: TestClient, admin_headers: dict[str, str]) -> None:
+    response = client.get("/api/v1/admin/users", params={"cursor": "invalid"}, headers=admin_headers)
+    assert response.status_code == 400
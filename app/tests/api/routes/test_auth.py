@@ -1,8 +1,24 @@
+import datetime
+import time
+
+import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from app.api.crud.auth import get_user_by_email
-from app.core.security import verify_password
+from app.api.routes import auth as auth_routes
+from app.core.activity import last_active_buffer
+from app.core.email_filter import email_filter
+from app.core.rate_limit import AuthRateLimiter, SharedTokenBuckets
+from app.core.security import password_hash_executor, verify_password
+from app.core.user_cache import user_cache
+from app.sqltypes import blind_index
+
+
+@pytest.fixture
+def restore_email_filter(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Built by the test or the lifespan, the filter would otherwise stay for the next tests
+    monkeypatch.setattr(email_filter, "_filter", email_filter._filter)
 
 
 def test_register_user(client: TestClient, db_session: Session) -> None:
@@ -18,6 +34,7 @@ def test_register_user(client: TestClient, db_session: Session) -> None:
     user = get_user_by_email(db_session, email="test@gmail.com")
     assert user
     assert user.email == "test@gmail.com"
+    assert user.email_bidx == blind_index("test@gmail.com")
     assert user.gender == "Male"
     assert verify_password("12345", user.password)
 
@@ -60,6 +77,61 @@ def test_login(client: TestClient) -> None:
     assert data["access_token"]
 
 
+def test_login_server_timing(client: TestClient) -> None:
+    response = client.post(
+        "/api/v1/login",
+        json={"email": "johndoe@gmail.com", "password": "12345"}
+    )
+
+    assert response.status_code == 200
+    # The credentials lookup and the `last_login` update
+    assert 'desc="2 queries"' in response.headers["Server-Timing"]
+
+
+def test_login_rate_limited(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    limiter = AuthRateLimiter(
+        SharedTokenBuckets(slots=64), ip_per_minute=60, ip_burst=10, email_per_minute=1, email_burst=1
+    )
+    monkeypatch.setattr(auth_routes, "auth_rate_limiter", limiter)
+
+    response = client.post(
+        "/api/v1/login",
+        json={"email": "johndoe@gmail.com", "password": "invalid"}
+    )
+    assert response.status_code == 400
+
+    response = client.post(
+        "/api/v1/login",
+        json={"email": "johndoe@gmail.com", "password": "12345"}
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_login_rate_limit_counts_failures_per_email(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    limiter = AuthRateLimiter(
+        SharedTokenBuckets(slots=64), ip_per_minute=60, ip_burst=10, email_per_minute=1, email_burst=1
+    )
+    monkeypatch.setattr(auth_routes, "auth_rate_limiter", limiter)
+
+    # Successful logins don't use up the email's attempts
+    for _ in range(2):
+        response = client.post(
+            "/api/v1/login",
+            json={"email": "johndoe@gmail.com", "password": "12345"}
+        )
+        assert response.status_code == 200
+
+    # Nor do the failures sent from another IP
+    for _ in range(5):
+        limiter.record_failure("login", ip="203.0.113.7", email="johndoe@gmail.com")
+    response = client.post(
+        "/api/v1/login",
+        json={"email": "johndoe@gmail.com", "password": "12345"}
+    )
+    assert response.status_code == 200
+
+
 def test_login_case_insensitive(client: TestClient) -> None:
     response = client.post(
         "/api/v1/login",
@@ -118,6 +190,18 @@ def test_login_inactive(client: TestClient, db_session: Session) -> None:
     assert content["detail"] == "Inactive user"
 
 
+def test_login_password_hasher_busy(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(password_hash_executor, "queue_size", 0)
+
+    response = client.post(
+        "/api/v1/login",
+        json={"email": "johndoe@gmail.com", "password": "12345"}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
 def test_register_user_me(client: TestClient, user_token_headers: dict[str, str]) -> None:
     response = client.get(
         "/api/v1/me",
@@ -133,3 +217,75 @@ def test_register_user_me(client: TestClient, user_token_headers: dict[str, str]
     assert set(data.keys()) == expected_data_fields
     assert data["user_id"] == "dd370c1f-3e09-4bb3-b569-d7ea9cb69a35"
     assert data["email"] == "johndoe@gmail.com"
+
+
+def test_user_me_last_active_flushed(
+        client: TestClient, db_session: Session, user_token_headers: dict[str, str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(last_active_buffer, "precision", datetime.timedelta(0))
+
+    response = client.get(
+        "/api/v1/me",
+        headers=user_token_headers
+    )
+
+    assert response.status_code == 200
+    assert last_active_buffer.flush() == 1
+
+    user = get_user_by_email(db_session, email="johndoe@gmail.com")
+    assert user
+    db_session.refresh(user)
+    assert datetime.datetime.now(datetime.UTC) - user.last_active < datetime.timedelta(minutes=1)
+
+
+@pytest.mark.usefixtures("restore_email_filter")
+def test_user_me_inactive_after_change(
+        client: TestClient, db_session: Session, user_token_headers: dict[str, str]
+) -> None:
+    # Entering the client runs the lifespan, which listens for user changes
+    with client:
+        for _ in range(50):
+            if user_cache.listening:
+                break
+            time.sleep(0.1)
+
+        response = client.get(
+            "/api/v1/me",
+            headers=user_token_headers
+        )
+        assert response.status_code == 200
+
+        user = get_user_by_email(db_session, email="johndoe@gmail.com")
+        assert user
+        user.is_active = False
+        db_session.commit()
+
+        for _ in range(50):
+            if user_cache.get(str(user.id)) is None:
+                break
+            time.sleep(0.1)
+
+        response = client.get(
+            "/api/v1/me",
+            headers=user_token_headers
+        )
+
+        user.is_active = True
+        db_session.commit()
+
+    assert response.status_code == 400
+    content = response.json()
+    assert content["detail"] == "Inactive user"
+
+
+@pytest.mark.usefixtures("restore_email_filter")
+def test_login_unknown_email_skips_database(client: TestClient) -> None:
+    email_filter.rebuild()
+
+    response = client.post(
+        "/api/v1/login",
+        json={"email": "unknown@gmail.com", "password": "12345"}
+    )
+
+    assert response.status_code == 400
+    assert 'desc="0 queries"' in response.headers["Server-Timing"]
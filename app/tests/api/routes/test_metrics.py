@@ -0,0 +1,18 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+
+def test_metrics(client: TestClient, user_token_headers: dict[str, str]) -> None:
+    client.get("/api/v1/me", headers=user_token_headers)
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain")
+    content = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/me",status="200"}' in content
+    # The pool of the engine used by the routes, the other one may not be created
+    assert f'db_pool_checked_out{{pool="{settings.DATABASE_MODE}"}}' in content
+    assert "password_hash_pending" in content
+    assert 'auth_cache_hits{cache="user"}' in content
@@ -0,0 +1,23 @@
+import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.utils.token_verifier import TokenVerifier
+
+
+@pytest.mark.usefixtures("asymmetric_signing")
+def test_jwks(client: TestClient) -> None:
+    response = client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert "max-age" in response.headers["Cache-Control"]
+    content = response.json()
+    assert content["keys"]
+
+    # Verify the token offline, the way another service would
+    verifier = TokenVerifier(jwks=content)
+    token = create_access_token("dd370c1f-3e09-4bb3-b569-d7ea9cb69a35", expires_delta=datetime.timedelta(minutes=5))
+    payload = verifier.verify(token)
+    assert payload["sub"] == "dd370c1f-3e09-4bb3-b569-d7ea9cb69a35"
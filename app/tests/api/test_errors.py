@@ -0,0 +1,14 @@
+from app.api.errors import ValidationErrorMessages
+
+
+def test_validation_error_messages() -> None:
+    messages = ValidationErrorMessages()
+    messages.add_parameter("query", "page_size")
+
+    assert messages.get({"type": "missing", "loc": ("query", "page_size"), "msg": ""}) == "Page size is required"
+    assert messages.get(
+        {"type": "greater_than", "loc": ("query", "page_size"), "msg": "", "input": "0"}
+    ) == "Page size should be greater than 0"
+    # Parameters not seen by `build` are added on first use
+    assert messages.get({"type": "uuid_parsing", "loc": ("path", "user_id"), "msg": ""}) == "Invalid user id!"
+    assert messages.get({"type": "string_type", "loc": ("body", "email"), "msg": "Invalid"}) == "Invalid"
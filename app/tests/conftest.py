@@ -1,15 +1,21 @@
 import datetime
-from collections.abc import Generator
+import json
+from collections.abc import AsyncGenerator, Generator
 from urllib.parse import urljoin
 
 import pytest
 from _pytest.main import Session as PytestSession
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
 
+from app.api.routes import well_known
+from app.core import security
 from app.core.config import settings
-from app.core.db import get_db, init_db
+from app.core.db import get_async_db, get_db, init_db
 from app.core.security import create_access_token
 from app.main import app
 from app.models import Base
@@ -17,6 +23,10 @@ from app.models import Base
 engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# TestClient may run each request on a new event loop, so async connections are not pooled
+async_engine = create_async_engine(str(settings.SQLALCHEMY_DATABASE_URI), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(autoflush=False, bind=async_engine, expire_on_commit=False)
+
 
 def pytest_sessionstart(session: PytestSession) -> None:
     # Run the check before tests start
@@ -47,7 +57,12 @@ def client() -> Generator[TestClient, None, None]:
         finally:
             db.close()
 
+    async def override_get_async_db() -> AsyncGenerator[AsyncSession, None]:
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     _client = TestClient(app)
     _client.base_url = urljoin(str(_client.base_url), settings.SERVICE_NAME)
     yield _client
@@ -63,3 +78,16 @@ def user_token_headers() -> dict[str, str]:
     return {
         "Authorization": f"Bearer {access_token}"
     }
+
+
+@pytest.fixture
+def asymmetric_signing(monkeypatch: pytest.MonkeyPatch) -> Generator[None, None, None]:
+    # Tokens are signed with the SECRET_KEY by default, as if JWT_ALGORITHM was "EdDSA" instead
+    signing_key = Ed25519PrivateKey.generate()
+    monkeypatch.setattr(security, "ALGORITHM", "EdDSA")
+    monkeypatch.setattr(security, "SIGNING_KEY", signing_key)
+    monkeypatch.setattr(security, "VERIFICATION_KEYS", {security.KEY_ID: signing_key.public_key()})
+    security.get_jwks.cache_clear()
+    monkeypatch.setattr(well_known, "JWKS_CONTENT", json.dumps(security.get_jwks()).encode())
+    yield
+    security.get_jwks.cache_clear()
@@ -0,0 +1,96 @@
+import asyncio
+import datetime
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import select, text
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.db import Database, ReplicaSet, database, prewarm_pool, read_scalars
+from app.core.security import create_access_token
+
+
+def test_prewarm_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "DATABASE_MODE", "sync")
+    database.engine.dispose()
+
+    asyncio.run(prewarm_pool())
+
+    assert database.engine.pool.checkedin() == settings.POSTGRES_POOL_SIZE  # type: ignore[attr-defined]
+
+
+def test_pool_stats() -> None:
+    engine = database.engine
+    before = engine.pool.stats()  # type: ignore[attr-defined]
+
+    connections = [engine.connect() for _ in range(settings.POSTGRES_POOL_SIZE + 1)]
+    stats = engine.pool.stats()  # type: ignore[attr-defined]
+    for connection in connections:
+        connection.close()
+
+    assert stats["checked_out"] == settings.POSTGRES_POOL_SIZE + 1
+    assert stats["overflow"] == 1
+    assert stats["checkouts"] - before["checkouts"] == settings.POSTGRES_POOL_SIZE + 1
+    assert stats["overflow_checkouts"] - before["overflow_checkouts"] == 1
+    assert stats["wait_seconds_total"] > before["wait_seconds_total"]
+
+
+def test_read_replica_routing(monkeypatch: pytest.MonkeyPatch) -> None:
+    replica_set = ReplicaSet([str(settings.SQLALCHEMY_DATABASE_URI)], max_lag=settings.POSTGRES_REPLICA_MAX_LAG)
+    replica = replica_set.replicas[0]
+    monkeypatch.setitem(database.__dict__, "replicas", replica_set)
+
+    with database.session_factory() as session:
+        assert read_scalars(session, select(text("1"))).one() == 1
+        assert session.info["replica"] is replica
+
+        session.execute(text("SELECT 1"))
+        assert session.get_bind(clause=select(text("1"))) is database.engine
+
+        session.info["has_written"] = True
+        assert session.get_bind(clause=select(text("1")).execution_options(read_replica=True)) is database.engine
+
+    replica.mark_down()
+    assert replica_set.choose() is None
+    replica.check()
+    assert replica.available and replica.latency is not None
+    replica.engine.dispose()
+
+
+def test_current_user_read_from_primary(monkeypatch: pytest.MonkeyPatch) -> None:
+    replica_set = ReplicaSet([str(settings.SQLALCHEMY_DATABASE_URI)], max_lag=settings.POSTGRES_REPLICA_MAX_LAG)
+    monkeypatch.setitem(database.__dict__, "replicas", replica_set)
+    token = create_access_token("dd370c1f-3e09-4bb3-b569-d7ea9cb69a35", expires_delta=datetime.timedelta(minutes=5))
+
+    with database.session_factory() as session:
+        user = get_current_user(session, HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+        assert "replica" not in session.info
+
+    assert user.email == "johndoe@gmail.com"
+    replica_set.replicas[0].engine.dispose()
+
+
+def test_choose_replica() -> None:
+    replica_set = ReplicaSet(["postgresql+psycopg://replica-1/db", "postgresql+psycopg://replica-2/db"], max_lag=5.0)
+    fast, slow = replica_set.replicas
+    fast.latency, slow.latency = 0.001, 0.1
+    assert replica_set.choose() is fast
+
+    fast.lag = 10.0
+    assert replica_set.choose() is slow
+
+    slow.mark_down()
+    assert replica_set.choose() is None
+
+
+def test_database_created_lazily() -> None:
+    lazy_database = Database()
+    assert not lazy_database.created("engine")
+
+    engine = lazy_database.engine
+    assert lazy_database.created("engine")
+    assert lazy_database.engine is engine
+    assert lazy_database.session_factory.kw["bind"] is engine
+    assert not lazy_database.created("async_engine")
+    engine.dispose()
@@ -0,0 +1,57 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.core.email_filter import BloomFilter, EmailFilter
+from app.sqltypes import blind_index
+
+
+def test_bloom_filter() -> None:
+    bloom_filter = BloomFilter(1000, 0.01)
+    digests = [os.urandom(32) for _ in range(1000)]
+    for digest in digests:
+        bloom_filter.add(digest)
+
+    assert all(digest in bloom_filter for digest in digests)
+    false_positives = sum(os.urandom(32) in bloom_filter for _ in range(10_000))
+    assert false_positives < 300
+
+
+def test_email_filter_rebuild() -> None:
+    email_filter = EmailFilter(capacity=1000, error_rate=0.01)
+    assert not email_filter.ready
+    assert email_filter.might_exist("unknown@gmail.com")
+
+    assert email_filter.rebuild() >= 1
+    assert email_filter.ready
+    assert email_filter.might_exist("JohnDoe@gmail.com")
+    assert not email_filter.might_exist("unknown@gmail.com")
+
+    email_filter.add(blind_index("unknown@gmail.com"))
+    assert email_filter.might_exist("unknown@gmail.com")
+
+
+def test_email_filter_listener_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    email_filter = EmailFilter(capacity=1000, error_rate=0.01)
+    email_filter.rebuild()
+    assert not email_filter.might_exist("brand-new-user@example.com")
+
+    def rebuild() -> int:
+        raise OperationalError("SELECT", {}, Exception("server closed the connection unexpectedly"))
+
+    monkeypatch.setattr(email_filter, "rebuild", rebuild)
+
+    async def run() -> None:
+        task = asyncio.create_task(email_filter.listen(refresh_interval=60, retry_interval=60))
+        while email_filter.ready:
+            await asyncio.sleep(0.01)
+        # The listener keeps retrying
+        assert not task.done()
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=10))
+
+    # Every email may exist until the filter is rebuilt, rather than a stale filter rejecting new users
+    assert email_filter.might_exist("brand-new-user@example.com")
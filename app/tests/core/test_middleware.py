@@ -0,0 +1,44 @@
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.middleware import SecurityHeadersMiddleware
+
+app = FastAPI()
+app.add_middleware(SecurityHeadersMiddleware)
+
+
+@app.get("/ok")
+async def ok() -> dict[str, str]:
+    return {"detail": "ok"}
+
+
+@app.get("/error")
+async def error() -> None:
+    raise RuntimeError("boom")
+
+
+@app.get("/stream")
+async def stream() -> StreamingResponse:
+    return StreamingResponse(iter([b"a", b"b"]))
+
+
+def test_security_headers() -> None:
+    client = TestClient(app)
+
+    response = client.get("/ok")
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+
+    response = client.get("/stream")
+    assert response.content == b"ab"
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+
+
+def test_security_headers_error() -> None:
+    client = TestClient(app, raise_server_exceptions=False)
+
+    response = client.get("/error")
+
+    assert response.status_code == 500
+    assert response.text == "Internal Server Error"
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
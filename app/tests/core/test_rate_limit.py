@@ -0,0 +1,60 @@
+import multiprocessing
+from multiprocessing.queues import Queue
+from pathlib import Path
+
+import pytest
+
+from app.core.rate_limit import AuthRateLimiter, SharedTokenBuckets
+
+
+def test_token_bucket() -> None:
+    buckets = SharedTokenBuckets(slots=64)
+
+    assert buckets.acquire("a", rate=1, burst=3, consume=False) == 0
+    assert [buckets.acquire("a", rate=1, burst=3) for _ in range(3)] == [0, 0, 0]
+    assert buckets.acquire("a", rate=1, burst=3, consume=False) == pytest.approx(1, abs=0.01)
+    assert buckets.acquire("a", rate=1, burst=3) == pytest.approx(1, abs=0.01)
+    # Other keys have their own bucket
+    assert buckets.acquire("b", rate=1, burst=3) == 0
+
+
+def test_token_bucket_full_table() -> None:
+    buckets = SharedTokenBuckets(slots=SharedTokenBuckets.PROBES)
+
+    for key in range(SharedTokenBuckets.PROBES + 1):
+        assert buckets.acquire(str(key), rate=0.001, burst=1) == 0
+
+
+def _acquire(path: str, results: Queue) -> None:
+    buckets = SharedTokenBuckets(path, slots=64)
+    results.put(buckets.acquire("shared", rate=0.001, burst=2))
+
+
+def test_token_bucket_shared_between_processes(tmp_path: Path) -> None:
+    path = str(tmp_path / "rate_limit")
+    results: multiprocessing.Queue[float] = multiprocessing.Queue()
+    for _ in range(3):
+        process = multiprocessing.get_context("fork").Process(target=_acquire, args=(path, results))
+        process.start()
+        process.join()
+
+    first, second, third = sorted(results.get() for _ in range(3))
+    assert first == second == 0
+    assert third > 0
+    assert SharedTokenBuckets(path, slots=64).acquire("shared", rate=0.001, burst=2) > 0
+
+
+def test_auth_rate_limiter() -> None:
+    limiter = AuthRateLimiter(
+        SharedTokenBuckets(slots=64), ip_per_minute=1, ip_burst=3, email_per_minute=1, email_burst=1
+    )
+
+    assert limiter.retry_after("login", ip="203.0.113.7", email="johndoe@gmail.com") == 0
+    # Only failed attempts count against the email, from the IP that sent them
+    assert limiter.retry_after("login", ip="203.0.113.8", email="johndoe@gmail.com") == 0
+    limiter.record_failure("login", ip="203.0.113.8", email="johndoe@gmail.com")
+    assert limiter.retry_after("login", ip="203.0.113.8", email=" JohnDoe@Gmail.com") > 0
+    assert limiter.retry_after("login", ip="203.0.113.9", email="johndoe@gmail.com") == 0
+    assert limiter.retry_after("login", ip="203.0.113.7", email="janedoe@gmail.com") == 0
+    assert limiter.retry_after("login", ip="203.0.113.7", email="other@gmail.com") == 0
+    assert limiter.retry_after("login", ip="203.0.113.7", email="another@gmail.com") > 0
@@ -0,0 +1,178 @@
+import asyncio
+import datetime
+import json
+import threading
+import time
+from collections.abc import Generator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import pytest
+
+from app.core.remote_auth import RemoteAuthClient, RemoteAuthError
+from app.core.security import create_access_token
+
+
+class StubAuthServer(ThreadingHTTPServer):
+    """ Stand-in for the auth service's `/me` endpoint """
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), StubAuthHandler)
+        self.hits = 0
+        self.status_code = 200
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/api/v1/me"
+
+
+class StubAuthHandler(BaseHTTPRequestHandler):
+    server: StubAuthServer
+
+    def do_GET(self) -> None:
+        self.server.hits += 1
+        if self.server.status_code == 200 and self.headers["Authorization"] == "Bearer invalid":
+            status_code, content = 403, {"detail": "Could not validate credentials"}
+        elif self.server.status_code == 200:
+            status_code, content = 200, {"data": {"user_id": "dd370c1f-3e09-4bb3-b569-d7ea9cb69a35"}}
+        else:
+            status_code, content = self.server.status_code, {"detail": "Internal Server Error"}
+        body = json.dumps(content).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def stub_server() -> Generator[StubAuthServer, None, None]:
+    server = StubAuthServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(url: str, *, fail_policy: str = "closed") -> RemoteAuthClient:
+    return RemoteAuthClient(
+        url, timeout=2, max_connections=10, cache_ttl=30, cache_size=100,
+        failure_threshold=2, reset_timeout=60, fail_policy=fail_policy,  # type: ignore[arg-type]
+    )
+
+
+def make_token() -> str:
+    return create_access_token(
+        "dd370c1f-3e09-4bb3-b569-d7ea9cb69a35", expires_delta=datetime.timedelta(minutes=5)
+    )
+
+
+def test_concurrent_lookups_are_coalesced_and_cached(stub_server: StubAuthServer) -> None:
+    client = make_client(stub_server.url)
+    token = make_token()
+
+    async def run() -> list[Any]:
+        try:
+            users = await asyncio.gather(*(client.get_user(token) for _ in range(20)))
+            users.append(await client.get_user(token))
+            return users
+        finally:
+            await client.close()
+
+    users = asyncio.run(run())
+
+    assert stub_server.hits == 1
+    assert all(user["data"]["user_id"] == "dd370c1f-3e09-4bb3-b569-d7ea9cb69a35" for user in users)
+
+
+def test_rejected_token_is_not_cached(stub_server: StubAuthServer) -> None:
+    client = make_client(stub_server.url)
+
+    async def run() -> None:
+        try:
+            for _ in range(2):
+                with pytest.raises(RemoteAuthError) as exc_info:
+                    await client.get_user("invalid")
+                assert exc_info.value.status_code == 403
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+
+    assert stub_server.hits == 2
+    assert client.breaker.state == "closed"
+
+
+def test_circuit_opens_fail_closed(stub_server: StubAuthServer) -> None:
+    client = make_client(stub_server.url)
+    stub_server.status_code = 500
+
+    async def run() -> None:
+        try:
+            for _ in range(4):
+                with pytest.raises(RemoteAuthError) as exc_info:
+                    await client.get_user(make_token())
+                assert exc_info.value.status_code == 503
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+
+    # Calls stop reaching the auth service once the failure threshold is hit
+    assert stub_server.hits == 2
+    assert client.breaker.state == "open"
+
+
+def test_circuit_opens_fail_open_serves_stale(stub_server: StubAuthServer) -> None:
+    client = make_client(stub_server.url, fail_policy="open")
+    client.cache_ttl = 0
+    token = make_token()
+
+    async def run() -> Any:
+        try:
+            await client.get_user(token)
+            stub_server.status_code = 500
+            return await client.get_user(token)
+        finally:
+            await client.close()
+
+    user = asyncio.run(run())
+
+    assert stub_server.hits == 2
+    assert user["data"]["user_id"] == "dd370c1f-3e09-4bb3-b569-d7ea9cb69a35"
+
+
+def test_cancelled_trial_releases_circuit(stub_server: StubAuthServer) -> None:
+    client = make_client(stub_server.url)
+    client.breaker.opened_at = time.monotonic() - client.breaker.reset_timeout
+    token = make_token()
+
+    class HangingClient:
+        async def get(self, *_args: Any, **_kwargs: Any) -> Any:
+            await asyncio.Event().wait()
+
+    async def run() -> None:
+        client._client = HangingClient()  # type: ignore[assignment]
+        request = asyncio.create_task(client.get_user(token))
+        await asyncio.sleep(0.01)
+        assert client.breaker.state == "half-open"
+        # The trial is cancelled, e.g. on shutdown
+        client._inflight[token].cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        client._client = None
+
+        try:
+            user = await client.get_user(token)
+        finally:
+            await client.close()
+        assert user["data"]["user_id"] == "dd370c1f-3e09-4bb3-b569-d7ea9cb69a35"
+
+    asyncio.run(run())
+
+    assert stub_server.hits == 1
+    assert client.breaker.state == "closed"
@@ -0,0 +1,25 @@
+import datetime
+
+import jwt
+import pytest
+
+from app.core import security
+from app.core.config import settings
+
+
+@pytest.mark.usefixtures("asymmetric_signing")
+def test_hs256_tokens_accepted_after_switching(monkeypatch: pytest.MonkeyPatch) -> None:
+    expire = datetime.datetime.now(datetime.UTC) + datetime.timedelta(minutes=5)
+    # Issued before switching from HS256, without a key id
+    previous_token = jwt.encode({"exp": expire, "sub": "johndoe"}, settings.SECRET_KEY, algorithm="HS256")
+    forged_token = jwt.encode({"exp": expire, "sub": "johndoe"}, "not the secret key", algorithm="HS256")
+    token = security.create_access_token("johndoe", expires_delta=datetime.timedelta(minutes=5))
+
+    with pytest.raises(jwt.PyJWTError):
+        security.decode_access_token(previous_token)
+
+    monkeypatch.setattr(security, "ACCEPT_HS256", True)
+    assert security.decode_access_token(previous_token)["sub"] == "johndoe"
+    assert security.decode_access_token(token)["sub"] == "johndoe"
+    with pytest.raises(jwt.PyJWTError):
+        security.decode_access_token(forged_token)
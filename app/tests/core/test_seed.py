@@ -0,0 +1,55 @@
+import io
+import json
+import uuid
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.api.crud.auth import get_user_by_email
+from app.core.seed import iter_json_array, seed
+from app.models import User
+
+
+def test_iter_json_array() -> None:
+    data = [{"model": "User", "pk": i, "fields": {"text": "]}," * (i % 5), "list": [1, {"a": "["}]}} for i in range(200)]
+    text = json.dumps(data, indent=2)
+    for chunk_size in (1, 7, 64 * 1024):
+        assert list(iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == data
+    assert list(iter_json_array(io.StringIO(" [ ] "))) == []
+
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"model": "User"}')))
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[{"model": "User"}'), chunk_size=4))
+
+
+def test_seed_upsert(db_session: Session) -> None:
+    pk = str(uuid.uuid4())
+    fields = {
+        "email": "seed@gmail.com",
+        "password": "hash",
+        "gender": "FEMALE",
+        "date_joined": "2024-01-01 00:00:00+00:00",
+        "key_version": 1,
+    }
+    try:
+        result = seed(db_session.connection(), [{"model": "User", "pk": pk, "fields": fields}], batch_size=1)
+        assert result.rows == 1
+
+        user = get_user_by_email(db_session, email="seed@gmail.com")
+        assert user
+        assert str(user.id) == pk
+        assert user.is_active
+        assert user.date_joined.year == 2024
+
+        fixtures = [{"model": "User", "pk": pk, "fields": {**fields, "email": "seed2@gmail.com", "is_active": False}}]
+        seed(db_session.connection(), fixtures)
+        db_session.expire_all()
+
+        assert get_user_by_email(db_session, email="seed@gmail.com") is None
+        user = get_user_by_email(db_session, email="seed2@gmail.com")
+        assert user
+        assert not user.is_active
+        assert db_session.get(User, uuid.UUID(pk)) is user
+    finally:
+        db_session.rollback()
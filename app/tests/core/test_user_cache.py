@@ -0,0 +1,92 @@
+import asyncio
+import datetime
+import uuid
+from typing import Any
+
+import psycopg
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user
+from app.core.db import database
+from app.core.security import create_access_token
+from app.core.user_cache import UserCache, UserSnapshot, user_cache
+
+
+def make_snapshot() -> UserSnapshot:
+    now = datetime.datetime.now(datetime.UTC)
+    return UserSnapshot(
+        id=uuid.uuid4(), email="johndoe@gmail.com", is_active=True,
+        date_joined=now, last_login=now, last_active=now,
+    )
+
+
+def test_user_cache_bypassed_while_not_listening() -> None:
+    user_cache = UserCache(maxsize=10, ttl=60)
+    user = make_snapshot()
+
+    assert user_cache.set(str(user.id), user, generation=user_cache.generation) is user
+    assert user_cache.get(str(user.id)) is None
+
+    user_cache.listening = True
+    user_cache.set(str(user.id), user, generation=user_cache.generation)
+    assert user_cache.get(str(user.id)) is user
+
+    # Changes aren't notified while the listener is disconnected
+    user_cache.listening = False
+    assert user_cache.get(str(user.id)) is None
+
+
+def test_user_cache_drops_snapshot_read_before_invalidation(monkeypatch: pytest.MonkeyPatch) -> None:
+    user_id = "dd370c1f-3e09-4bb3-b569-d7ea9cb69a35"
+    token = create_access_token(user_id, expires_delta=datetime.timedelta(minutes=5))
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    monkeypatch.setattr(user_cache, "listening", True)
+    user_cache.invalidate(user_id)
+    scalars = Session.scalars
+
+    def scalars_then_invalidate(session: Session, *args: Any, **kwargs: Any) -> Any:
+        # The user changes once it was read, before its snapshot is cached
+        result = scalars(session, *args, **kwargs)
+        user_cache.invalidate(user_id)
+        return result
+
+    with database.session_factory() as session:
+        monkeypatch.setattr(Session, "scalars", scalars_then_invalidate)
+        assert get_current_user(session, credentials).email == "johndoe@gmail.com"
+        assert user_cache.get(user_id) is None
+
+        monkeypatch.setattr(Session, "scalars", scalars)
+        get_current_user(session, credentials)
+        assert user_cache.get(user_id) is not None
+    user_cache.invalidate(user_id)
+
+
+def test_user_cache_listener_survives_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    user_cache = UserCache(maxsize=10, ttl=60)
+    user_cache.listening = True
+    user = make_snapshot()
+    user_cache.set(str(user.id), user, generation=user_cache.generation)
+    attempts = 0
+
+    async def connect(*_args: Any, **_kwargs: Any) -> psycopg.AsyncConnection[Any]:
+        nonlocal attempts
+        attempts += 1
+        raise RuntimeError("Unexpected error")
+
+    monkeypatch.setattr(psycopg.AsyncConnection, "connect", connect)
+
+    async def run() -> None:
+        task = asyncio.create_task(user_cache.listen(retry_interval=0.01))
+        while attempts < 3:
+            await asyncio.sleep(0.01)
+        # Retried rather than ended by the error
+        assert not task.done()
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=10))
+
+    assert not user_cache.listening
+    user_cache.listening = True
+    assert user_cache.get(str(user.id)) is None
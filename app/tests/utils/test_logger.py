@@ -0,0 +1,42 @@
+import datetime
+import json
+import logging
+import time
+from pathlib import Path
+
+from app.utils.logger import DailyFileHandler, JsonFormatter, get_logger
+
+
+def make_record(message: str, *, created: float) -> logging.LogRecord:
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, message, None, None)
+    record.created = created
+    return record
+
+
+def test_daily_file_handler_moves_to_next_day(tmp_path: Path) -> None:
+    handler = DailyFileHandler(tmp_path, "access.log")
+    today = datetime.datetime.now()
+    tomorrow = today + datetime.timedelta(days=1)
+
+    handler.emit(make_record("first", created=today.timestamp()))
+    handler.emit(make_record("second", created=tomorrow.timestamp()))
+    handler.close()
+
+    assert (handler._path(today.date())).read_text() == "first\n"
+    assert (handler._path(tomorrow.date())).read_text() == "second\n"
+
+
+def test_json_formatter() -> None:
+    entry = json.loads(JsonFormatter().format(make_record("hello", created=time.time())))
+
+    assert entry["message"] == "hello"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app"
+
+
+def test_get_logger_reuses_queue_handler() -> None:
+    logger = get_logger("app.tests.logger")
+    get_logger("app.tests.logger")
+
+    assert len(logger.handlers) == 1
+    assert get_logger("app.tests.other").handlers[0] is logger.handlers[0]
@@ -1,13 +1,182 @@
+import atexit
+import datetime
+import json
 import logging
-from datetime import date
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Any
 
 from app.core.config import settings
 
 
+class DailyFileHandler(logging.FileHandler):
+    """
+    Writes to `<log_dir>/<year>/<month>/<day>/<filename>`, moving on to the next day's directory
+    with the first record of that day.
+
+    Files are opened in append mode and never renamed, so every gunicorn worker can safely
+    write to the same files, unlike the rotating handlers which rename them.
+    """
+
+    def __init__(self, log_dir: str | Path, filename: str):
+        self.log_dir = Path(log_dir)
+        self.filename = filename
+        self.day = datetime.date.today()
+        super().__init__(self._path(self.day), encoding="utf-8", delay=True)
+
+    def _path(self, day: datetime.date) -> Path:
+        return self.log_dir / str(day.year) / str(day.month) / str(day.day) / self.filename
+
+    def _open(self) -> Any:
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        day = datetime.date.fromtimestamp(record.created)
+        if day != self.day:
+            self.day = day
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None  # type: ignore[assignment]
+            self.baseFilename = os.path.abspath(self._path(day))
+        super().emit(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """ Formats records as JSON lines """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.process,
+            "message": record.getMessage(),
+        }
+        # Structured fields passed as `logger.info(..., extra={"fields": {...}})`
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _is_sqlalchemy(record: logging.LogRecord) -> bool:
+    return record.name.startswith("sqlalchemy")
+
+
+def _build_handlers(log_level: int) -> list[logging.Handler]:
+    # Define log message format
+    if settings.LOG_JSON:
+        log_formatter: logging.Formatter = JsonFormatter()
+    else:
+        log_formatter = logging.Formatter(
+            "[%(asctime)s] %(levelname)-7s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S"
+        )
+
+    # Create a stream handler for console output
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(log_level)
+
+    # Create a file handler for log files
+    access_file_handler = DailyFileHandler(settings.LOG_DIR, "access.log")
+    access_file_handler.setLevel(log_level)
+
+    # Create a separate file handler for error logs
+    error_file_handler = DailyFileHandler(settings.LOG_DIR, "error.log")
+    error_file_handler.setLevel(logging.WARNING)
+
+    handlers: list[logging.Handler] = [console_handler, access_file_handler, error_file_handler]
+    for handler in handlers:
+        handler.addFilter(lambda record: not _is_sqlalchemy(record))
+
+    # SQLAlchemy logs only go to their own file
+    if log_level == logging.DEBUG:
+        sqlalchemy_file_handler = DailyFileHandler(settings.LOG_DIR, "sqlalchemy.log")
+        sqlalchemy_file_handler.setLevel(logging.INFO)
+        sqlalchemy_file_handler.addFilter(_is_sqlalchemy)
+        handlers.append(sqlalchemy_file_handler)
+
+    for handler in handlers:
+        handler.setFormatter(log_formatter)
+    return handlers
+
+
+class _LogPipeline:
+    """
+    Loggers only put records on a queue; a background thread formats and writes them,
+    so a slow disk never blocks the event loop.
+
+    The thread and the file handlers are only set up with the first record, so importing
+    modules that create loggers stays cheap.
+    """
+
+    def __init__(self) -> None:
+        self.handler: _PipelineHandler | None = None
+        self.listener: QueueListener | None = None
+        self.log_level = logging.DEBUG
+        self.stopped = False
+        self._lock = threading.Lock()
+
+    def get_handler(self, log_level: int) -> QueueHandler:
+        with self._lock:
+            if self.handler is None:
+                self.log_level = log_level
+                self.handler = _PipelineHandler(queue.Queue(-1), self)
+            return self.handler
+
+    def start(self) -> None:
+        with self._lock:
+            if self.listener is None and self.handler is not None and not self.stopped:
+                self.listener = QueueListener(
+                    self.handler.queue, *_build_handlers(self.log_level), respect_handler_level=True
+                )
+                self.listener.start()
+
+    def restart(self) -> None:
+        # The writer thread doesn't survive a fork, the child gets a new queue and thread
+        if self.listener is None or self.handler is None:
+            return
+        log_queue: queue.Queue[logging.LogRecord] = queue.Queue(-1)
+        self.handler.queue = log_queue
+        self.listener = QueueListener(log_queue, *self.listener.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self) -> None:
+        # Writes out the queued records
+        self.stopped = True
+        if self.listener is not None:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
+
+
+class _PipelineHandler(QueueHandler):
+    """ Puts records on the pipeline's queue, starting the pipeline with the first one """
+
+    def __init__(self, log_queue: queue.Queue[logging.LogRecord], pipeline: _LogPipeline):
+        super().__init__(log_queue)
+        self.pipeline = pipeline
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.pipeline.listener is None:
+            self.pipeline.start()
+        super().enqueue(record)
+
+
+_pipeline = _LogPipeline()
+atexit.register(_pipeline.stop)
+os.register_at_fork(after_in_child=_pipeline.restart)
+
+
 def get_logger(name: str | None = None) -> logging.Logger:
     """
-    Creates and configures a logger with both stream and file handlers.
+    Creates and configures a logger writing to the console and to daily log files,
+    through the shared logging queue.
 
     Args:
         name (str | None): The name of the logger. If None, the default module name is used.
@@ -22,6 +191,7 @@ def get_logger(name: str | None = None) -> logging.Logger:
 
     # Set logging level based on the environment
     log_level = logging.INFO if settings.ENVIRONMENT == "production" else logging.DEBUG
+    queue_handler = _pipeline.get_handler(log_level)
 
     # Create the logger
     logger = logging.getLogger(name)
@@ -30,37 +200,9 @@ def get_logger(name: str | None = None) -> logging.Logger:
     # Prevent log messages from propagating to the root logger
     logger.propagate = False
 
-    # Define log message format
-    log_formatter = logging.Formatter(
-        "[%(asctime)s] %(levelname)-7s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
-
-    # Create a stream handler for console output
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(log_level)
-    console_handler.setFormatter(log_formatter)
-
-    # Create a file handler for log files
-    today = date.today()
-    log_directory = Path(settings.LOG_DIR) / str(today.year) / str(today.month) / str(today.day)
-    if not log_directory.exists():
-        log_directory.mkdir(parents=True)
-
-    access_file_handler = logging.FileHandler(log_directory / "access.log", encoding="utf-8")
-    access_file_handler.setLevel(log_level)
-    access_file_handler.setFormatter(log_formatter)
-
-    # Create a separate file handler for error logs
-    error_file_handler = logging.FileHandler(log_directory / "error.log", encoding="utf-8")
-    error_file_handler.setLevel(logging.WARNING)
-    error_file_handler.setFormatter(log_formatter)
-
-    # Add handlers to the logger if not already present
-    if not logger.hasHandlers():
-        logger.addHandler(console_handler)
-        logger.addHandler(access_file_handler)
-        logger.addHandler(error_file_handler)
+    # Add the queue handler if not already present
+    if queue_handler not in logger.handlers:
+        logger.addHandler(queue_handler)
 
     # Set up SQLAlchemy logging
     if log_level == logging.DEBUG:
@@ -68,12 +210,7 @@ def get_logger(name: str | None = None) -> logging.Logger:
         sqlalchemy_logger.setLevel(logging.INFO)
         sqlalchemy_logger.propagate = False  # Prevent propagation to parent handlers
 
-        # Create a file handler for SQLAlchemy logs
-        sqlalchemy_file_handler = logging.FileHandler(log_directory / "sqlalchemy.log", encoding="utf-8")
-        sqlalchemy_file_handler.setLevel(logging.INFO)
-        sqlalchemy_file_handler.setFormatter(log_formatter)
-
-        if not sqlalchemy_logger.hasHandlers():
-            sqlalchemy_logger.addHandler(sqlalchemy_file_handler)
+        if queue_handler not in sqlalchemy_logger.handlers:
+            sqlalchemy_logger.addHandler(queue_handler)
 
     return logger
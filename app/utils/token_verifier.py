@@ -0,0 +1,58 @@
+"""
+Offline verification of the access tokens issued by this service.
+
+This module only depends on PyJWT (with the `crypto` extra), so other services can
+copy or import it to validate tokens locally against the published JWKS instead of
+calling the `/me` endpoint on every request:
+
+    verifier = TokenVerifier("http://auth-service/.well-known/jwks.json")
+    payload = verifier.verify(token)  # payload["sub"] is the user id
+"""
+from collections.abc import Sequence
+from typing import Any
+
+import jwt
+
+
+class TokenVerifier:
+    """
+    Verifies access tokens with the public key matching their key id.
+
+    Keys are fetched from `jwks_url` and cached for `cache_ttl` seconds. A token with an
+    unknown key id triggers a refetch, so key rotations are picked up without a restart.
+    """
+
+    def __init__(
+            self, jwks_url: str | None = None, *, jwks: dict[str, Any] | None = None,
+            algorithms: Sequence[str] = ("EdDSA", "RS256"), cache_ttl: int = 300, timeout: int = 5,
+    ):
+        """
+        Args:
+            jwks_url (str | None): URL of the `/.well-known/jwks.json` endpoint.
+            jwks (dict | None): A static key set to use instead of fetching `jwks_url`.
+            algorithms (Sequence[str]): The accepted signing algorithms.
+            cache_ttl (int): Seconds to cache the fetched key set.
+            timeout (int): Timeout in seconds of the key set request.
+        """
+        if (jwks_url is None) == (jwks is None):
+            raise ValueError("Exactly one of jwks_url or jwks is required")
+        self.algorithms = list(algorithms)
+        self._client = jwt.PyJWKClient(jwks_url, lifespan=cache_ttl, timeout=timeout) if jwks_url else None
+        self._keys = {key.key_id: key for key in jwt.PyJWKSet.from_dict(jwks).keys} if jwks else {}
+
+    def get_signing_key(self, token: str) -> jwt.PyJWK:
+        if self._client is not None:
+            return self._client.get_signing_key_from_jwt(token)
+        key = self._keys.get(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            raise jwt.PyJWKClientError("Unable to find a signing key that matches the token")
+        return key
+
+    def verify(self, token: str) -> dict[str, Any]:
+        """
+        Verify a token and return its payload.
+
+        Raises:
+            jwt.PyJWTError: If the token is invalid, expired or signed with an unknown key.
+        """
+        return jwt.decode(token, self.get_signing_key(token).key, algorithms=self.algorithms)
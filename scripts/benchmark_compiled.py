@@ -0,0 +1,184 @@
+"""
+Compares the request throughput of the app compiled by `scripts/compile.py` with the pure
+Python app. With `--min-speedup`, it fails when the compiled app is less than that many times
+as fast: results vary by about 10-20% between runs, so a gate needs some margin (e.g. 0.8).
+
+The app is copied to a temporary directory and compiled there (reusing the build cache), then
+each tree serves the same requests in a fresh interpreter, taking the best of `--rounds` runs.
+Requests are sent through the ASGI interface directly, so no server or client is measured, and
+don't reach the database: the user of the token is put in the user cache beforehand.
+
+Usage:
+    python scripts/benchmark_compiled.py [requests] [--rounds 3] [--min-speedup 0.8] [--pxd]
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from compile import EXTENSION_SUFFIX, PythonBuildManager, change_directory
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+async def request(app: Any, method: str, path: str, headers: list[tuple[bytes, bytes]], body: bytes) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), *headers],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+    status = 0
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def serve(requests: int) -> dict[str, tuple[int, float]]:
+    # Imported here, from the tree on PYTHONPATH
+    from app.api.errors import validation_error_messages
+    from app.core.config import settings
+    from app.core.security import create_access_token
+    from app.core.user_cache import UserSnapshot, user_cache
+    from app.main import app
+
+    # The lifespan isn't run, its listeners would connect to the database and clear the user cache,
+    # which is used as if its listener was connected
+    validation_error_messages.build(app.routes)
+    user_id, now = uuid.uuid4(), datetime.datetime.now(datetime.UTC)
+    user_cache.ttl = float("inf")
+    user_cache.listening = True
+    user_cache.set(str(user_id), UserSnapshot(
+        id=user_id, email="benchmark@example.com", is_active=True,
+        date_joined=now, last_login=now, last_active=now,
+    ), generation=user_cache.generation)
+    token = create_access_token(str(user_id), expires_delta=datetime.timedelta(hours=1))
+    api = settings.SERVICE_NAME + settings.API_V1_STR
+    cases = {
+        "GET /.well-known/jwks.json": ("GET", f"{settings.SERVICE_NAME}/.well-known/jwks.json", [], b""),
+        "GET /me": ("GET", f"{api}/me", [(b"authorization", f"Bearer {token}".encode())], b""),
+        "POST /register (invalid)": (
+            "POST", f"{api}/register", [(b"content-type", b"application/json")],
+            b'{"email": "invalid", "password": "", "gender": "?"}',
+        ),
+    }
+
+    results = {}
+    for name, (method, path, headers, body) in cases.items():
+        # Warm up
+        status = await request(app, method, path, headers, body)
+        start = time.perf_counter()
+        for _ in range(requests):
+            await request(app, method, path, headers, body)
+        results[name] = status, requests / (time.perf_counter() - start)
+    return results
+
+
+def child(requests: int) -> None:
+    import app.core.security
+
+    print(json.dumps({
+        "compiled": app.core.security.__file__.endswith(EXTENSION_SUFFIX),
+        "results": asyncio.run(serve(requests)),
+    }))
+
+
+def compile_tree(directory: Path, cache_folder: str, pxd: bool) -> None:
+    shutil.copytree(
+        ROOT / "app", directory / "app",
+        ignore=shutil.ignore_patterns("__pycache__", "logs", "*.c", f"*{EXTENSION_SUFFIX}"),
+    )
+    with change_directory(directory):
+        # The same modules as the Docker build, so the build cache is shared
+        PythonBuildManager(
+            directory="app",
+            build_folder="build",
+            exclude_files=["compile"],
+            exclude_folders=["alembic", "alembic/versions", "logs"],
+            cache_folder=cache_folder,
+            pxd_folder=str(ROOT / "scripts" / "pxd") if pxd else None,
+        ).execute()
+
+
+def run(tree: Path, requests: int) -> dict[str, Any]:
+    # From the project root, so the settings read its `.env`
+    process = subprocess.run(
+        [sys.executable, __file__, str(requests), "--child"],
+        capture_output=True, text=True, cwd=ROOT, env={**os.environ, "PYTHONPATH": str(tree)},
+    )
+    if process.returncode != 0:
+        sys.exit(process.stderr)
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the throughput of the compiled and pure Python app")
+    parser.add_argument("requests", type=int, nargs="?", default=5_000, help="Requests per case and round")
+    parser.add_argument("--rounds", type=int, default=3, help="Runs of each tree, the best one counts")
+    parser.add_argument("--min-speedup", type=float, default=None, help="Fail below this compiled/pure ratio")
+    parser.add_argument("--pxd", action="store_true", help="Compile with the C types of scripts/pxd")
+    parser.add_argument(
+        "--cache-folder", default=str(Path.home() / ".cache" / "app-compile"),
+        help="Build cache of scripts/compile.py",
+    )
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.requests)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        compiled_tree = Path(directory)
+        compile_tree(compiled_tree, args.cache_folder, args.pxd)
+        best: dict[str, dict[str, float]] = {"pure": {}, "compiled": {}}
+        statuses: dict[str, dict[str, int]] = {"pure": {}, "compiled": {}}
+        for _ in range(args.rounds):
+            # Alternated, so both trees see the same conditions
+            for label, tree in (("pure", ROOT), ("compiled", compiled_tree)):
+                output = run(tree, args.requests)
+                if output["compiled"] != (label == "compiled"):
+                    sys.exit(f"The {label} tree was expected, got the other one")
+                for name, (status, rate) in output["results"].items():
+                    best[label][name] = max(best[label].get(name, 0.0), rate)
+                    statuses[label][name] = status
+    if statuses["pure"] != statuses["compiled"]:
+        sys.exit(f"The compiled app responds differently: {statuses}")
+
+    print(f"{'request':<28} {'status':>6} {'pure req/s':>12} {'compiled req/s':>16} {'speedup':>8}")
+    failed = False
+    for name, pure in best["pure"].items():
+        compiled = best["compiled"][name]
+        speedup = compiled / pure
+        failed |= args.min_speedup is not None and speedup < args.min_speedup
+        print(f"{name:<28} {statuses['pure'][name]:>6} {pure:>12.0f} {compiled:>16.0f} {speedup:>7.2f}x")
+    if failed:
+        sys.exit(f"The compiled app is less than {args.min_speedup:.2f}x as fast as the pure Python app")
+
+
+if __name__ == "__main__":
+    main()
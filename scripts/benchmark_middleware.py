@@ -0,0 +1,80 @@
+"""
+Compares the per-request overhead of the security headers middleware written with
+`@app.middleware("http")` (`BaseHTTPMiddleware`) and as pure ASGI middleware.
+
+The apps are called through the ASGI interface directly, so only the middleware is measured.
+
+Usage:
+    PYTHONPATH=. python scripts/benchmark_middleware.py [requests]
+"""
+import asyncio
+import sys
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Route
+from starlette.types import ASGIApp, Message
+
+from app.core.middleware import SecurityHeadersMiddleware
+
+
+async def endpoint(_request: Request) -> Response:
+    return PlainTextResponse("ok")
+
+
+async def base_http_middleware(request: Request, call_next: RequestResponseEndpoint) -> Response:
+    # The previous `db_session_middleware`
+    response = Response("Internal Server Error", status_code=500)
+    try:
+        response = await call_next(request)
+    except Exception as e:
+        print(e)
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    return response
+
+
+def build_app(middleware: str) -> ASGIApp:
+    app = Starlette(routes=[Route("/", endpoint)])
+    if middleware == "BaseHTTPMiddleware":
+        app.add_middleware(BaseHTTPMiddleware, dispatch=base_http_middleware)
+    elif middleware == "pure ASGI":
+        app.add_middleware(SecurityHeadersMiddleware)
+    return app
+
+
+async def run(app: ASGIApp, requests: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/", "raw_path": b"/", "root_path": "", "query_string": b"", "headers": [],
+        "client": ("127.0.0.1", 1234), "server": ("127.0.0.1", 80),
+    }
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(_message: Message) -> None:
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+async def main(requests: int) -> None:
+    results = {}
+    for middleware in ("none", "BaseHTTPMiddleware", "pure ASGI"):
+        app = build_app(middleware)
+        await run(app, 1000)  # Warm up
+        results[middleware] = await run(app, requests) / requests * 1_000_000
+
+    print(f"{'middleware':<20} {'us/request':>12} {'overhead':>10}")
+    for middleware, per_request in results.items():
+        print(f"{middleware:<20} {per_request:>12.1f} {per_request - results['none']:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000))
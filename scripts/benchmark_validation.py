@@ -0,0 +1,108 @@
+"""
+Compares the cost of formatting validation errors before and after the messages were
+precompiled: the 422 handler's per-error message, and constructing a `BaseModel` with
+invalid data.
+
+Usage:
+    PYTHONPATH=. python scripts/benchmark_validation.py [iterations]
+"""
+import sys
+import timeit
+from typing import Any, ClassVar, LiteralString
+
+from pydantic import BaseModel as PydanticBaseModel
+from pydantic import Field, ValidationError
+from pydantic_core import InitErrorDetails, PydanticCustomError
+
+from app.api.base_model import BaseModel
+from app.api.errors import ValidationErrorMessages
+
+ERRORS = [
+    {"type": "missing", "loc": ("query", "page_size"), "msg": "Field required", "input": None},
+    {"type": "greater_than", "loc": ("query", "page"), "msg": "Input should be greater than 0", "input": -1},
+    {"type": "uuid_parsing", "loc": ("path", "user_id"), "msg": "Input should be a valid UUID", "input": "x"},
+    {"type": "string_type", "loc": ("body", "email"), "msg": "Input should be a valid string", "input": 1},
+]
+
+
+def get_custom_error_message(err):
+    # The previous per-error formatting of the 422 handler
+    if err["loc"][0] in ["query", "path"]:
+        if err["type"] == "missing":
+            return f"{err['loc'][1].replace('_', ' ').capitalize()} is required"
+        elif err["type"] == "string_pattern_mismatch":
+            return f"Please enter a valid {err['loc'][1].replace('_', ' ')}"
+        elif err["type"] == "greater_than":
+            return f"{err['loc'][1].replace('_', ' ').capitalize()} should be greater than {err.get('input')}"
+        elif err["type"] == "less_than":
+            return f"{err['loc'][1].replace('_', ' ').capitalize()} should be less than {err.get('input')}"
+        elif err["type"] == "uuid_parsing":
+            return f"Invalid {err['loc'][1].replace('_', ' ')}!"
+        else:
+            return err["msg"]
+    else:
+        return err["msg"]
+
+
+class PreviousBaseModel(PydanticBaseModel):
+    # The previous `BaseModel`, rebuilding every error of every invalid payload
+    error_messages: ClassVar[dict[str, dict[str, LiteralString]]] = {}
+
+    def __init__(self, /, **data: Any) -> None:
+        try:
+            super().__init__(**data)
+        except ValidationError as e:
+            new_errors: list[InitErrorDetails] = []
+            for error in e.errors():
+                custom_message = self.error_messages.get(error["loc"][0], {}).get(error["type"])
+                ctx = error.get("ctx")
+                new_errors.append(
+                    InitErrorDetails(
+                        type=PydanticCustomError(
+                            error["type"],
+                            custom_message.format(**ctx) if custom_message and ctx else custom_message or error["msg"],
+                        ),
+                        loc=error["loc"],
+                        input=error.get("input"),
+                        ctx=ctx,
+                    )
+                )
+            raise ValidationError.from_exception_data(title=self.__class__.__name__, line_errors=new_errors)
+
+
+class PreviousSchema(PreviousBaseModel):
+    email: str
+    password: str = Field(min_length=8)
+
+
+class Schema(BaseModel):
+    email: str
+    password: str = Field(min_length=8)
+
+
+def construct(cls: type[PydanticBaseModel]) -> None:
+    try:
+        cls(email=1, password="short")
+    except ValidationError:
+        pass
+
+
+def main(iterations: int) -> None:
+    messages = ValidationErrorMessages()
+    for loc in {error["loc"] for error in ERRORS}:
+        messages.add_parameter(*loc)
+
+    cases = {
+        "422 messages, previous": lambda: [get_custom_error_message(error) for error in ERRORS],
+        "422 messages, lookup table": lambda: [messages.get(error) for error in ERRORS],
+        "BaseModel errors, previous": lambda: construct(PreviousSchema),
+        "BaseModel errors, precompiled": lambda: construct(Schema),
+    }
+    print(f"{'case':<32} {'us/call':>10}")
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=iterations, repeat=5))
+        print(f"{name:<32} {seconds / iterations * 1_000_000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
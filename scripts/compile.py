@@ -1,12 +1,28 @@
+import argparse
+import hashlib
+import json
 import os
 import shutil
+import sysconfig
+import time
 from collections.abc import Generator
 from contextlib import contextmanager
 from pathlib import Path
 
+import Cython
 from Cython.Build import cythonize
 from setuptools import Extension, setup
 
+COMPILER_DIRECTIVES = {
+    "always_allow_keywords": True,
+    "c_string_type": "str",
+    "c_string_encoding": "utf8",
+    "language_level": 3
+}
+EXTENSION_SUFFIX = sysconfig.get_config_var("EXT_SUFFIX")
+# Cached extensions unused for this long are removed
+CACHE_MAX_AGE = 30 * 24 * 3600
+
 
 @contextmanager
 def change_directory(path: Path) -> Generator[None, None, None]:
@@ -30,6 +46,7 @@ class PythonBuildManager:
             self, directory: str, *, build: bool = True, build_folder: str = "build",
             delete_py: bool = False, delete_c: bool = False, delete_pyc: bool = False,
             exclude_files: list[str] | None = None, exclude_folders: list[str] | None = None,
+            nthreads: int | None = None, cache_folder: str | None = None, pxd_folder: str | None = None,
     ):
         """
         Initializes the PythonBuildManager with build and delete options.
@@ -43,6 +60,12 @@ class PythonBuildManager:
             delete_pyc (bool): Flag to control if `.pyc` files should be deleted.
             exclude_files (list | None): List of filenames to exclude from operations.
             exclude_folders (list | None): List of folders to exclude from operations.
+            nthreads (int | None): Modules cythonized and compiled in parallel, defaults to the CPU count.
+            cache_folder (str | None): Directory keeping the built extensions by the hash of their
+                inputs, so unchanged modules aren't rebuilt. It can be shared by builds of other
+                versions or options. No caching when None.
+            pxd_folder (str | None): Directory of augmenting `.pxd` files, laid out like `directory`
+                (e.g. `core/security.pxd`), adding C types to the modules. Not used when None.
         """
         self.directory = Path(directory).resolve()
         self.build_flag = build
@@ -53,14 +76,79 @@ class PythonBuildManager:
         self.exclude_files = exclude_files or []
         self.exclude_folders = exclude_folders or []
         self.exclude_folders = [Path(exclude_folder).resolve() for exclude_folder in self.exclude_folders]
+        self.nthreads = nthreads or os.cpu_count() or 1
+        self.cache_folder = Path(cache_folder).resolve() if cache_folder else None
+        self.pxd_folder = Path(pxd_folder).resolve() if pxd_folder else None
         self.extensions = []
         self.python_files = list(self.directory.glob("**/*.py"))
 
+    def find_pxd(self, file: Path) -> Path | None:
+        """
+        Returns the augmenting `.pxd` file of a module in `pxd_folder`, if there is one.
+        """
+        if self.pxd_folder is None:
+            return None
+        # Where Cython looks for it, the modules are named relative to `directory`
+        pxd = self.pxd_folder / file.relative_to(self.directory).with_suffix(".pxd")
+        return pxd if pxd.exists() else None
+
+    def cache_key(self, package_name: str, file: Path) -> str:
+        """
+        Hashes everything the extension of a module is built from: its source, its `.pxd`,
+        the Cython version and the compiler directives.
+        """
+        digest = hashlib.sha256(f"{package_name}\0{Cython.__version__}\0".encode())
+        digest.update(json.dumps(COMPILER_DIRECTIVES, sort_keys=True).encode())
+        digest.update(file.read_bytes())
+        if pxd := self.find_pxd(file):
+            digest.update(pxd.read_bytes())
+        return digest.hexdigest()
+
+    def restore_cached(self, key: str, file: Path) -> bool:
+        """
+        Copies the cached extension of a module next to it, returns False if it isn't cached.
+        """
+        if self.cache_folder is None:
+            return False
+        cached = self.cache_folder / f"{key}{EXTENSION_SUFFIX}"
+        if not cached.exists():
+            return False
+        shutil.copy2(cached, file.with_name(file.stem + EXTENSION_SUFFIX))
+        # Marks it as used, see `update_cache`
+        os.utime(cached)
+        return True
+
+    def update_cache(self, built: dict[str, Path]) -> None:
+        """
+        Stores the extensions just built, and removes those unused for `CACHE_MAX_AGE`.
+
+        Args:
+            built (dict): Cache key -> module of the extensions built.
+        """
+        if self.cache_folder is None:
+            return
+        self.cache_folder.mkdir(parents=True, exist_ok=True)
+        for key, file in built.items():
+            shutil.copy2(file.with_name(file.stem + EXTENSION_SUFFIX), self.cache_folder / f"{key}{EXTENSION_SUFFIX}")
+        # Not only those of this build: other branches or options (e.g. `--pxd`) share the cache
+        expired = time.time() - CACHE_MAX_AGE
+        for cached in self.cache_folder.glob(f"*{EXTENSION_SUFFIX}"):
+            if cached.stat().st_mtime < expired:
+                cached.unlink()
+
     def build_extensions(self) -> None:
         """
         Builds Cython extensions from Python files in the specified directory,
         in-place, excluding files and folders specified in `exclude_files` and `exclude_folders`.
+
+        Modules are cythonized and compiled `nthreads` at a time, and modules whose extension
+        is in the cache are copied from it instead.
+
+        Raises:
+            RuntimeError: If a `.pxd` of `pxd_folder` isn't applied to its module.
         """
+        built = {}
+        augmented = set()
         for file in self.python_files:
             filename = file.resolve().stem
             if file.stat().st_size != 0 and filename not in self.exclude_files:
@@ -70,26 +158,42 @@ class PythonBuildManager:
                         relpath.replace("/", ".").replace("\\", ".") + "." + filename
                         if relpath != "." else filename
                     )
+                    key = self.cache_key(package_name, file)
+                    if pxd := self.find_pxd(file):
+                        augmented.add(pxd)
+                    if self.restore_cached(key, file):
+                        print(f"Module {package_name} (cached)")
+                        continue
                     print(f"Module {package_name}")
                     # Append the Cython extension
                     self.extensions.append(Extension(package_name, [str(file)]))
+                    built[key] = file
+
+        if self.pxd_folder is not None and (unused := set(self.pxd_folder.glob("**/*.pxd")) - augmented):
+            raise RuntimeError(f"No module to augment with {', '.join(sorted(map(str, unused)))}")
 
-        # Temporarily change to the `app` directory to allow in-place compilation
-        with change_directory(self.directory):
-            # Build all extensions with a custom build folder0
-            setup(
-                ext_modules=cythonize(
-                    self.extensions,
-                    compiler_directives={
-                        "always_allow_keywords": True,
-                        "c_string_type": "str",
-                        "c_string_encoding": "utf8",
-                        "language_level": 3
+        if self.extensions:
+            # Temporarily change to the `app` directory to allow in-place compilation
+            with change_directory(self.directory):
+                # Build all extensions with a custom build folder
+                setup(
+                    ext_modules=cythonize(
+                        self.extensions,
+                        compiler_directives=COMPILER_DIRECTIVES,
+                        include_path=[str(self.pxd_folder)] if self.pxd_folder else [],
+                        nthreads=self.nthreads,
+                    ),
+                    script_args=["build_ext", "--inplace"],
+                    options={
+                        "build": {"build_base": self.build_folder},
+                        "build_ext": {"parallel": self.nthreads},
                     }
-                ),
-                script_args=["build_ext", "--inplace"],
-                options={"build": {"build_base": self.build_folder}}
-            )
+                )
+            for file in built.values():
+                # Every augmenting `.pxd` declares `cpdef` functions, whose C code takes this flag
+                if self.find_pxd(file) and "__pyx_skip_dispatch" not in file.with_suffix(".c").read_text():
+                    raise RuntimeError(f"The .pxd of {file} wasn't applied")
+        self.update_cache(built)
 
         # Delete the build folder after in-place compilation
         self.delete_build_folder()
@@ -98,7 +202,8 @@ class PythonBuildManager:
         """
         Deletes the 'build' directory created during the compilation process, if it exists.
         """
-        build_dir = Path(self.build_folder)
+        # Relative to `directory`, where the extensions are built
+        build_dir = self.directory / self.build_folder
         if build_dir.exists() and build_dir.is_dir():
             shutil.rmtree(build_dir)
             print("Deleted 'build' folder.")
@@ -135,6 +240,16 @@ class PythonBuildManager:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the app with Cython")
+    parser.add_argument("--threads", type=int, default=None, help="Parallel jobs, defaults to the CPU count")
+    parser.add_argument(
+        "--cache-folder", default=str(Path.home() / ".cache" / "app-compile"),
+        help="Where built extensions are kept between builds",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Rebuild every module")
+    parser.add_argument("--pxd", action="store_true", help="Add the C types of scripts/pxd to the hot modules")
+    args = parser.parse_args()
+
     manager = PythonBuildManager(
         directory="app",
         build=True,
@@ -143,6 +258,9 @@ if __name__ == "__main__":
         delete_c=True,
         delete_pyc=True,
         exclude_files=["compile"],
-        exclude_folders=["alembic", "alembic/versions", "logs"]
+        exclude_folders=["alembic", "alembic/versions", "logs"],
+        nthreads=args.threads,
+        cache_folder=None if args.no_cache else args.cache_folder,
+        pxd_folder=str(Path(__file__).parent / "pxd") if args.pxd else None,
     )
     manager.execute()
@@ -1,6 +1,7 @@
 import json
 import multiprocessing
 import os
+import shutil
 
 host = os.getenv("HOST", "0.0.0.0")
 port = os.getenv("PORT", "80")
@@ -28,8 +29,38 @@ timeout = int(os.getenv("TIMEOUT", "120"))
 keepalive = int(os.getenv("KEEP_ALIVE", "5"))
 errorlog = os.getenv("ERROR_LOG", "-")
 accesslog = os.getenv("ACCESS_LOG", "-")
+# Addresses of the proxies trusted to set X-Forwarded-For and X-Forwarded-Proto, comma separated
+# ("*" trusts any). Behind an untrusted proxy every client has the proxy's IP, and so shares its
+# login and registration rate limit.
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
 worker_tmp_dir = "/dev/shm"
 
+# Workers write their metrics to files in this directory, so a scrape of any worker covers all of them.
+# Set before the workers are forked, as prometheus_client reads it at import.
+prometheus_multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR", "/dev/shm/prometheus")
+os.environ["PROMETHEUS_MULTIPROC_DIR"] = prometheus_multiproc_dir
+
+
+# Login and registration rate limits are shared by the workers through this file
+rate_limit_file = os.getenv("RATE_LIMIT_FILE", "/dev/shm/rate_limit")
+os.environ["RATE_LIMIT_FILE"] = rate_limit_file
+
+
+def on_starting(_server):
+    # Drop the files of a previous run
+    shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+    os.makedirs(prometheus_multiproc_dir)
+    if os.path.exists(rate_limit_file):
+        os.remove(rate_limit_file)
+
+
+def child_exit(_server, worker):
+    from prometheus_client import multiprocess
+
+    # Drop the values of the live gauges of the worker
+    multiprocess.mark_process_dead(worker.pid)
+
+
 # For debugging and testing
 log_data = {
     "loglevel": loglevel,
@@ -40,6 +71,9 @@ log_data = {
     "keepalive": keepalive,
     "errorlog": errorlog,
     "accesslog": accesslog,
+    "forwarded_allow_ips": forwarded_allow_ips,
+    "prometheus_multiproc_dir": prometheus_multiproc_dir,
+    "rate_limit_file": rate_limit_file,
     # Additional, non-gunicorn variables
     "workers_per_core": workers_per_core_str,
     "max_workers": max_workers_str,
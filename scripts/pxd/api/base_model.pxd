@@ -0,0 +1,8 @@
+# Augments app/api/base_model.py when compiled with `scripts/compile.py --pxd`. Validation errors
+# and the compiled `error_messages` are plain lists and dicts.
+
+import cython
+
+
+@cython.locals(new_errors=list, error=dict, ctx=object, custom_message=object)
+cpdef list _custom_errors(list errors, dict messages)
@@ -0,0 +1,8 @@
+# Augments app/core/security.py when compiled with `scripts/compile.py --pxd`. The arguments match
+# the `str` annotations, which the compiled module already checks.
+
+cpdef dict decode_access_token(str token)
+
+cpdef str get_password_hash(str password)
+
+cpdef bint verify_password(str password, str hashed_password)